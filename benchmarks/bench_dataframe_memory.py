@@ -0,0 +1,92 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare the memory per record of DataFrames built by pandas.DataFrame.from_records() and by the typed construction
+used by query_table, for a synthetic result set
+
+    python benchmarks/bench_dataframe_memory.py --records 1000000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import pandas as pd
+
+from dagster_toolkit.postgres.dtypes import build_dataframe, INT4_OID, INT8_OID, FLOAT8_OID, TIMESTAMP_OID, \
+    VARCHAR_OID, BOOL_OID
+
+DESCRIPTION = [
+    ('id', INT8_OID),
+    ('quantity', INT4_OID),
+    ('price', FLOAT8_OID),
+    ('created', TIMESTAMP_OID),
+    ('region', VARCHAR_OID),
+    ('active', BOOL_OID),
+]
+
+REGIONS = ['north', 'south', 'east', 'west']
+
+
+def generate_results(records):
+    """
+    Generate a synthetic result set, as would be returned by cursor.fetchall()
+    :param records: number of records
+    :return: list of record tuples
+    """
+    start = datetime(2020, 1, 1)
+    return [
+        (index, random.randint(0, 1000), random.random() * 100, start + timedelta(seconds=index),
+         random.choice(REGIONS), index % 2 == 0)
+        for index in range(records)
+    ]
+
+
+def measure(build, results):
+    """
+    Measure DataFrame construction
+    :param build: function building a DataFrame from results
+    :param results: list of record tuples
+    :return: tuple of (construction time in seconds, memory per record in bytes)
+    """
+    start = perf_counter()
+    df = build(results)
+    elapsed = perf_counter() - start
+    return elapsed, df.memory_usage(deep=True).sum() / len(df)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=1000000, help='number of records')
+    args = parser.parse_args()
+
+    results = generate_results(args.records)
+
+    methods = [
+        ('from_records', lambda res: pd.DataFrame.from_records(res)),
+        ('typed', lambda res: build_dataframe(res, DESCRIPTION)),
+        ('typed+categorical', lambda res: build_dataframe(res, DESCRIPTION, categorical_max_ratio=0.1)),
+    ]
+    print(f'{args.records} records')
+    for name, build in methods:
+        elapsed, per_record = measure(build, results)
+        print(f'{name:<18} {per_record:8.1f} bytes/record  {elapsed:.3f}s')
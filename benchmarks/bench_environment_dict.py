@@ -0,0 +1,68 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare building an EnvironmentDict with chained add_solid_input() calls and with add_solid_inputs()
+
+    python benchmarks/bench_environment_dict.py --solids 1000 --inputs 5
+"""
+import argparse
+import timeit
+
+from dagster_toolkit.environ import EnvironmentDict
+
+
+def chained(solids, inputs):
+    environ = EnvironmentDict()
+    for solid in range(solids):
+        for ip in range(inputs):
+            environ.add_solid_input(f'solid_{solid}', f'input_{ip}', ip)
+            environ.add_composite_solid_input(f'composite_{solid}', 'child', f'input_{ip}', ip)
+    return environ.build(deep=True)
+
+
+def bulk(solids, inputs):
+    environ = EnvironmentDict()
+    environ.add_solid_inputs(
+        entry
+        for solid in range(solids)
+        for ip in range(inputs)
+        for entry in [(f'solid_{solid}', f'input_{ip}', ip),
+                      ((f'composite_{solid}', 'child'), f'input_{ip}', ip)]
+    )
+    return environ.build(deep=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--solids', type=int, default=1000, help='number of solids')
+    parser.add_argument('--inputs', type=int, default=5, help='number of inputs per solid')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs of each method')
+    args = parser.parse_args()
+
+    assert chained(args.solids, args.inputs) == bulk(args.solids, args.inputs)
+
+    print(f'{args.solids} solids, {args.inputs} inputs')
+    results = {}
+    for name, build in [('chained', chained), ('bulk', bulk)]:
+        results[name] = min(timeit.repeat(lambda: build(args.solids, args.inputs), number=1, repeat=args.repeat))
+        print(f'{name:<8} {results[name]:.4f}s')
+    print(f'speedup  {results["chained"] / results["bulk"]:.1f}x')
@@ -0,0 +1,68 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Measure the import time of dagster_toolkit using python -X importtime, for the package alone, for EnvironmentDict and
+for all the solids
+
+    python benchmarks/bench_import_time.py
+"""
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = [
+    ('package', 'import dagster_toolkit'),
+    ('EnvironmentDict', 'from dagster_toolkit import EnvironmentDict'),
+    ('all', 'from dagster_toolkit import *'),
+]
+
+
+def import_time(statement):
+    """
+    Measure the import time of a statement in a new interpreter
+    :param statement: python import statement
+    :return: tuple of (total import time in microseconds, number of modules imported)
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    # lines are "import time: self [us] | cumulative | imported package", top-level imports are not indented
+    total = 0
+    modules = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules += 1
+        if not name.startswith('  '):
+            total += int(cumulative)
+    return total, modules
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs of each statement')
+    args = parser.parse_args()
+
+    for name, statement in STATEMENTS:
+        times = [import_time(statement) for _ in range(args.repeat)]
+        best = min([total for total, _ in times])
+        print(f'{name:<16} {best / 1000:8.1f}ms  {times[0][1]:5d} modules')
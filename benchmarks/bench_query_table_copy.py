@@ -0,0 +1,72 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Compare query_table load times using fetchall() and COPY ... TO STDOUT
+
+    python benchmarks/bench_query_table_copy.py path/to/postgres_cfg "SELECT * FROM my_table"
+"""
+import argparse
+from time import perf_counter
+
+from dagster import ModeDefinition, execute_solid
+
+from dagster_toolkit.postgres import postgres_warehouse_resource, query_table
+
+
+def time_query(postgres_cfg, sql, copy, repeat):
+    """
+    Time query_table
+    :param postgres_cfg: path to server configuration file
+    :param sql: the SQL select query to execute
+    :param copy: use COPY ... TO STDOUT flag
+    :param repeat: number of runs
+    :return: tuple of (best time in seconds, number of records)
+    """
+    mode_def = ModeDefinition(resource_defs={'postgres_warehouse': postgres_warehouse_resource})
+    run_config = {
+        'resources': {'postgres_warehouse': {'config': {'postgres_cfg': postgres_cfg}}},
+        'solids': {'query_table': {'config': {'copy': copy}}},
+    }
+    best = None
+    records = 0
+    for _ in range(repeat):
+        start = perf_counter()
+        result = execute_solid(query_table, mode_def=mode_def, input_values={'sql': sql}, run_config=run_config)
+        elapsed = perf_counter() - start
+        records = len(result.output_value())
+        best = elapsed if best is None else min(best, elapsed)
+    return best, records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('postgres_cfg', help='path to server configuration file')
+    parser.add_argument('sql', help='SQL select query to execute')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of each method')
+    args = parser.parse_args()
+
+    fetch_time, records = time_query(args.postgres_cfg, args.sql, False, args.repeat)
+    copy_time, _ = time_query(args.postgres_cfg, args.sql, True, args.repeat)
+
+    print(f'{records} records')
+    print(f'fetchall: {fetch_time:.3f}s')
+    print(f'copy:     {copy_time:.3f}s ({fetch_time / copy_time:.1f}x)')
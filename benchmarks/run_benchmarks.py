@@ -0,0 +1,312 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Benchmark the toolkit's solids against local stand-ins, and compare the results with a stored baseline
+
+Each benchmark runs a solid through dagster's execution API, in its own process so peak memory usage is isolated,
+and records the wall time, rows per second and peak RSS. Any data a benchmark needs is prepared by its setup step, in
+a separate process beforehand, so benchmarks may be run in any combination. A benchmark which fails is reported and
+the remaining benchmarks are still run.
+The Postgres benchmarks use the server configuration file specified by the DAGSTER_TOOLKIT_BENCH_POSTGRES_CFG
+environment variable, or else a throwaway local cluster if initdb is available. The mongoDB benchmarks require
+mongomock.
+
+    python benchmarks/run_benchmarks.py --rows 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from dagster import ModeDefinition, execute_solid
+
+from dagster_toolkit.files import load_csv
+from dagster_toolkit.mongo import download_from_mongo
+from dagster_toolkit.postgres import postgres_warehouse_resource, create_table, load_dataframe, query_table
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from standins import generate_csv, generate_dataframe, local_postgres, mongomock_warehouse_resource  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'dagster_toolkit_bench')
+
+BENCH_TABLE_COLUMNS = 'id bigint, quantity integer, price double precision, created timestamp, region text'
+
+
+def timed_solid(solid_def, resource_defs=None, **kwargs):
+    """
+    Execute a solid
+    :param solid_def: solid to execute
+    :param resource_defs: dict of resource definitions
+    :param kwargs: arguments as specified by dagster.execute_solid()
+    :return: tuple of (wall time in seconds, result)
+    """
+    mode_def = ModeDefinition(resource_defs=resource_defs) if resource_defs is not None else None
+    start = perf_counter()
+    result = execute_solid(solid_def, mode_def=mode_def, **kwargs)
+    return perf_counter() - start, result
+
+
+def postgres_run_config(postgres_cfg, solid_name, solid_config=None):
+    run_config = {'resources': {'postgres_warehouse': {'config': {'postgres_cfg': postgres_cfg}}}}
+    if solid_config is not None:
+        run_config['solids'] = {solid_name: {'config': solid_config}}
+    return run_config
+
+
+def bench_load_csv(rows, postgres_cfg, solid_config=None):
+    csv_path = generate_csv(DATA_DIR, rows)
+    run_config = {'solids': {'load_csv': {'config': solid_config}}} if solid_config is not None else None
+    return timed_solid(load_csv, input_values={'csv_path': csv_path, 'kwargs': {}}, run_config=run_config)[0]
+
+
+def bench_load_csv_compact(rows, postgres_cfg):
+    return bench_load_csv(rows, postgres_cfg, solid_config={'compact': True, 'category_max_ratio': 0.1})
+
+
+def bench_download_from_mongo(rows, postgres_cfg, solid_config=None):
+    resource_defs = {'mongo_warehouse': mongomock_warehouse_resource(rows)}
+    run_config = {'solids': {'download_from_mongo': {'config': solid_config}}} if solid_config is not None else None
+    return timed_solid(download_from_mongo, resource_defs=resource_defs,
+                       input_values={'sel_filter': {}, 'projection': None}, run_config=run_config)[0]
+
+
+def bench_download_from_mongo_batched(rows, postgres_cfg):
+    return bench_download_from_mongo(rows, postgres_cfg, solid_config={'batch_size': 10000})
+
+
+def create_bench_table(table_name, postgres_cfg):
+    timed_solid(create_table, resource_defs={'postgres_warehouse': postgres_warehouse_resource},
+                input_values={'create_columns': BENCH_TABLE_COLUMNS, 'table_name': table_name},
+                run_config=postgres_run_config(postgres_cfg, 'create_table'))
+
+
+def load_bench_table(table_name, rows, postgres_cfg):
+    """
+    Load generated data into a benchmark table, replacing any existing contents
+    :param table_name: name of table
+    :param rows: number of rows
+    :param postgres_cfg: server configuration
+    :return: wall time in seconds
+    """
+    return timed_solid(load_dataframe, resource_defs={'postgres_warehouse': postgres_warehouse_resource},
+                       input_values={'df': generate_dataframe(rows), 'table_name': table_name},
+                       run_config=postgres_run_config(postgres_cfg, 'load_dataframe', {'mode': 'truncate'}))[0]
+
+
+def setup_load_dataframe(rows, postgres_cfg):
+    create_bench_table(f'bench_load_{rows}', postgres_cfg)
+
+
+def bench_load_dataframe(rows, postgres_cfg):
+    return load_bench_table(f'bench_load_{rows}', rows, postgres_cfg)
+
+
+def setup_query_table(rows, postgres_cfg):
+    table_name = f'bench_query_{rows}'
+    create_bench_table(table_name, postgres_cfg)
+    load_bench_table(table_name, rows, postgres_cfg)
+
+
+def bench_query_table(rows, postgres_cfg, solid_config=None):
+    return timed_solid(query_table, resource_defs={'postgres_warehouse': postgres_warehouse_resource},
+                       input_values={'sql': f'SELECT * FROM bench_query_{rows}'},
+                       run_config=postgres_run_config(postgres_cfg, 'query_table', solid_config))[0]
+
+
+def bench_query_table_copy(rows, postgres_cfg):
+    return bench_query_table(rows, postgres_cfg, solid_config={'copy': True})
+
+
+# benchmark name: (function, requirement, setup function or None), in order of execution
+BENCHMARKS = {
+    'load_csv': (bench_load_csv, None, None),
+    'load_csv_compact': (bench_load_csv_compact, None, None),
+    'download_from_mongo': (bench_download_from_mongo, 'mongomock', None),
+    'download_from_mongo_batched': (bench_download_from_mongo_batched, 'mongomock', None),
+    'load_dataframe': (bench_load_dataframe, 'postgres', setup_load_dataframe),
+    'query_table': (bench_query_table, 'postgres', setup_query_table),
+    'query_table_copy': (bench_query_table_copy, 'postgres', setup_query_table),
+}
+
+
+def peak_rss():
+    """
+    Get the peak resident set size of this process
+    :return: size in bytes
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def run_child(name, rows, postgres_cfg, setup=False):
+    """
+    Run a benchmark, or its setup step, in this process and print the result as json
+    """
+    function, _, setup_function = BENCHMARKS[name]
+    if setup:
+        setup_function(rows, postgres_cfg)
+        print(json.dumps({}))
+        return
+    elapsed = function(rows, postgres_cfg)
+    print(json.dumps({
+        'wall': elapsed,
+        'rows_per_sec': rows / elapsed,
+        'peak_rss': peak_rss(),
+    }))
+
+
+def run_process(name, rows, postgres_cfg, setup=False):
+    """
+    Run a benchmark, or its setup step, in a new process
+    :return: result dict
+    :raises subprocess.CalledProcessError: if the process fails
+    """
+    args = [sys.executable, os.path.abspath(__file__), '--child', name, '--rows', str(rows),
+            '--postgres-cfg', json.dumps(postgres_cfg)]
+    if setup:
+        args.append('--setup')
+    result = subprocess.run(args, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(name, rows, postgres_cfg):
+    """
+    Run a benchmark in a new process, after running its setup step in another
+    :return: result dict
+    :raises subprocess.CalledProcessError: if either process fails
+    """
+    _, _, setup_function = BENCHMARKS[name]
+    if setup_function is not None:
+        run_process(name, rows, postgres_cfg, setup=True)
+    return run_process(name, rows, postgres_cfg)
+
+
+def available(requirement, postgres_cfg):
+    if requirement == 'postgres':
+        return postgres_cfg is not None
+    if requirement == 'mongomock':
+        try:
+            import mongomock  # noqa: F401
+        except ImportError:
+            return False
+    return True
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline
+    :param results: dict of results by benchmark key
+    :param baseline: dict of baseline results by benchmark key
+    :param tolerance: allowed fractional increase in wall time and peak RSS
+    :return: list of regression descriptions
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ['wall', 'peak_rss']:
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{key} {metric}: {result[metric]:.4g} vs baseline {base[metric]:.4g} '
+                                   f'(+{result[metric] / base[metric] - 1:.0%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='data sizes in rows, e.g. 10000 to 10000000')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS.keys()), default=list(BENCHMARKS.keys()),
+                        help='benchmarks to run')
+    parser.add_argument('--baseline', default=BASELINE, help='path to baseline results')
+    parser.add_argument('--update-baseline', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed fractional increase in wall time and peak RSS; default 0.2')
+    parser.add_argument('--output', help='path to save results to')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--postgres-cfg', help=argparse.SUPPRESS)
+    parser.add_argument('--setup', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    if args.child is not None:
+        run_child(args.child, args.rows[0], json.loads(args.postgres_cfg), setup=args.setup)
+        return 0
+
+    results = {}
+    failures = []
+    with local_postgres() as postgres_cfg:
+        for rows in args.rows:
+            for name in args.benchmarks:
+                _, requirement, _ = BENCHMARKS[name]
+                key = f'{name}[{rows}]'
+                if not available(requirement, postgres_cfg):
+                    print(f'{key:<40} skipped, {requirement} not available')
+                    continue
+                try:
+                    results[key] = run_benchmark(name, rows, postgres_cfg)
+                except subprocess.CalledProcessError as cpe:
+                    failures.append(key)
+                    print(f'{key:<40} FAILED, exit status {cpe.returncode}')
+                    continue
+                print(f'{key:<40} {results[key]["wall"]:9.3f}s {results[key]["rows_per_sec"]:12.0f} rows/s '
+                      f'{results[key]["peak_rss"] / 1024 ** 2:9.1f}MB')
+
+    if args.output is not None:
+        with open(args.output, 'w') as fhandle:
+            json.dump(results, fhandle, indent=2, sort_keys=True)
+
+    for key in failures:
+        print(f'FAILED {key}')
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as fhandle:
+                baseline = json.load(fhandle)
+        baseline.update(results)
+        with open(args.baseline, 'w') as fhandle:
+            json.dump(baseline, fhandle, indent=2, sort_keys=True)
+        print(f'Baseline saved to {args.baseline}')
+        return 1 if len(failures) > 0 else 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}, use --update-baseline to create one')
+        return 1 if len(failures) > 0 else 0
+
+    with open(args.baseline, 'r') as fhandle:
+        regressions = compare(results, json.load(fhandle), args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    return 1 if len(regressions) > 0 or len(failures) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
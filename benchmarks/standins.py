@@ -0,0 +1,160 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Local stand-ins for the servers and files used by the benchmarks
+"""
+import getpass
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from dagster import resource
+
+POSTGRES_CFG_ENV = 'DAGSTER_TOOLKIT_BENCH_POSTGRES_CFG'
+
+
+def generate_dataframe(rows, seed=0):
+    """
+    Generate a DataFrame of synthetic data
+    :param rows: number of rows
+    :param seed: random seed, so the data is reproducible
+    :return: panda DataFrame
+    """
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        'id': np.arange(rows, dtype='int64'),
+        'quantity': rng.randint(0, 1000, size=rows),
+        'price': rng.random_sample(size=rows) * 100,
+        'created': pd.Timestamp('2020-01-01') + pd.to_timedelta(np.arange(rows), unit='s'),
+        'region': rng.choice(['north', 'south', 'east', 'west'], size=rows),
+    })
+
+
+def generate_csv(directory, rows):
+    """
+    Generate a csv file of synthetic data, reusing a previously generated file if possible
+    :param directory: directory to write to
+    :param rows: number of rows
+    :return: path to file
+    """
+    csv_path = os.path.join(directory, f'bench_{rows}.csv')
+    if not os.path.exists(csv_path):
+        generate_dataframe(rows).to_csv(csv_path, index=False)
+    return csv_path
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_postgres():
+    """
+    Provide a Postgres server configuration; the configuration file specified by the
+    DAGSTER_TOOLKIT_BENCH_POSTGRES_CFG environment variable, or else a throwaway local cluster created with initdb
+    :return: path to server configuration file or configuration dict, or None if neither is available
+    """
+    if os.environ.get(POSTGRES_CFG_ENV):
+        yield os.environ[POSTGRES_CFG_ENV]
+        return
+    if shutil.which('initdb') is None or shutil.which('pg_ctl') is None:
+        yield None
+        return
+
+    data_dir = tempfile.mkdtemp(prefix='bench_pg_')
+    port = _free_port()
+    subprocess.run(['initdb', '-D', data_dir, '-A', 'trust', '-U', getpass.getuser()],
+                   check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(['pg_ctl', '-D', data_dir, '-o', f'-p {port} -k {data_dir}', '-w', 'start'],
+                   check=True, stdout=subprocess.DEVNULL)
+    try:
+        yield {
+            'host': 'localhost',
+            'port': port,
+            'dbname': 'postgres',
+            'user': getpass.getuser(),
+            'password': '',
+        }
+    finally:
+        subprocess.run(['pg_ctl', '-D', data_dir, '-m', 'immediate', 'stop'], stdout=subprocess.DEVNULL)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+class MockMongoDb(object):
+    """
+    In-process stand-in for db_toolkit's MongoDb, backed by mongomock
+    """
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getitem__(self, key):
+        return 'mongomock' if key == 'server' else None
+
+    def get_collection(self):
+        return self._collection
+
+    def is_authenticated(self):
+        return True
+
+    def close_connection(self):
+        pass
+
+
+class MockMongoWarehouse(object):
+    """
+    Stand-in for MongoWarehouse serving a mongomock collection
+    """
+    def __init__(self, collection):
+        self._collection = collection
+
+    def get_connection(self, context):
+        return MockMongoDb(self._collection)
+
+    def release_connection(self, context, client):
+        pass
+
+
+def mongomock_warehouse_resource(rows):
+    """
+    Create a mongo_warehouse resource serving a mongomock collection of synthetic documents
+    :param rows: number of documents
+    :return: resource definition
+    """
+    import mongomock
+
+    collection = mongomock.MongoClient().bench.documents
+    df = generate_dataframe(rows)
+    df['created'] = df['created'].dt.to_pydatetime()
+    collection.insert_many(df.to_dict('records'))
+
+    @resource
+    def mongo_warehouse(_):
+        return MockMongoWarehouse(collection)
+
+    return mongo_warehouse
@@ -19,10 +19,19 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from dagster_toolkit.postgres.__init__ import __all__ as postgres_all
-from dagster_toolkit.mongo.__init__ import __all__ as mongo_all
-from dagster_toolkit.files.__init__ import __all__ as csv_all
-from dagster_toolkit.environ.__init__ import __all__ as environ_all
+from dagster_toolkit.lazy import install_lazy_attributes
+from dagster_toolkit.postgres import __all__ as postgres_all
+from dagster_toolkit.mongo import __all__ as mongo_all
+from dagster_toolkit.files import __all__ as csv_all
+from dagster_toolkit.environ import __all__ as environ_all
+
+# subpackages import their attributes lazily, so only the dependencies which are used get loaded
+install_lazy_attributes(__name__, dict(
+    [(name, '.postgres') for name in postgres_all] +
+    [(name, '.mongo') for name in mongo_all] +
+    [(name, '.files') for name in csv_all] +
+    [(name, '.environ') for name in environ_all]
+))
 
 # if somebody does "from dagster_toolkit import *", this is what they will
 # be able to access:
@@ -19,11 +19,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .environment_dict import EnvironmentDict
+from dagster_toolkit.lazy import install_lazy_attributes
+
+# attributes are imported from their submodules on first access, so only the dependencies which are used get loaded
+install_lazy_attributes(__name__, {
+    'EnvironmentDict': '.environment_dict',
+    'EnvironmentTemplate': '.environment_template',
+    'TemplateParam': '.environment_template',
+})
 
 
 # if somebody does "from dagster_toolkit.environ import *", this is what they will
 # be able to access:
 __all__ = [
     'EnvironmentDict',
+    'EnvironmentTemplate',
+    'TemplateParam',
 ]
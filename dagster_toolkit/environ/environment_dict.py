@@ -19,7 +19,43 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import copy
+import hashlib
+import json
 import pprint
+from collections.abc import Mapping
+
+from .environment_template import EnvironmentTemplate
+
+
+_HASH_MODULUS = 2 ** 256
+
+
+def _leaf_hash(key_path, value):
+    """
+    Hash a leaf of an environment dictionary
+    :param key_path: tuple of keys from the top of the dictionary to the leaf
+    :param value: leaf value
+    :return: hash
+    """
+    if value is None or isinstance(value, (str, int, float)) or (isinstance(value, dict) and len(value) == 0):
+        # repr is canonical for scalars and empty dicts, and much faster than json
+        leaf = repr((key_path, value))
+    else:
+        leaf = json.dumps([key_path, value], sort_keys=True, default=repr)
+    return int.from_bytes(hashlib.sha256(leaf.encode('utf-8')).digest(), 'big')
+
+
+def _tree_hash(key_path, value):
+    """
+    Hash the leaves of an environment dictionary subtree; a leaf is a non-dict value or an empty dict
+    :param key_path: tuple of keys from the top of the dictionary to the subtree
+    :param value: subtree
+    :return: hash, the sum of the leaf hashes
+    """
+    if isinstance(value, dict) and len(value) > 0:
+        return sum([_tree_hash(key_path + (key,), child) for key, child in value.items()]) % _HASH_MODULUS
+    return _leaf_hash(key_path, value)
 
 
 class EnvironmentDict:
@@ -39,6 +75,38 @@ class EnvironmentDict:
             'solids': {},
             'resources': {}
         }
+        # content hash, maintained as the sum of the hashes of the leaves so it can be updated incrementally
+        self._hash = _tree_hash((), self._e_dict)
+
+    def _set_item(self, node, key_path, key, value):
+        """
+        Set a value in the dictionary, updating the content hash
+        :param node: dict to set value in
+        :param key_path: tuple of keys from the top of the dictionary to node
+        :param key: key to set
+        :param value: value to set; must not be modified other than by _set_item()
+        """
+        if key in node:
+            self._hash -= _tree_hash(key_path + (key,), node[key])
+        elif len(node) == 0 and len(key_path) > 0:
+            # node is no longer an empty leaf
+            self._hash -= _leaf_hash(key_path, node)
+        node[key] = value
+        self._hash = (self._hash + _tree_hash(key_path + (key,), value)) % _HASH_MODULUS
+
+    def _get_child(self, node, key_path, key):
+        """
+        Get a child dict, creating it if necessary
+        :param node: parent dict
+        :param key_path: tuple of keys from the top of the dictionary to node
+        :param key: key of child
+        :return: child dict
+        """
+        child = node.get(key)
+        if child is None:
+            child = {}
+            self._set_item(node, key_path, key, child)
+        return child
 
     def add_solid(self, solid_name):
         """
@@ -47,7 +115,7 @@ class EnvironmentDict:
         """
         return self.__add_solid(solid_name)
 
-    def __add_solid(self, solid_name, chk_dict=None):
+    def __add_solid(self, solid_name, chk_dict=None, chk_path=()):
         """
         Add a solid to the environment dictionary
         :param solid_name: name of solid to add
@@ -55,7 +123,8 @@ class EnvironmentDict:
         if self._solid_name_check(solid_name, chk_dict=chk_dict) == EnvironmentDict._VALID:
             if chk_dict is None:
                 chk_dict = self._e_dict
-            chk_dict['solids'][solid_name] = {}
+            solids = self._get_child(chk_dict, chk_path, 'solids')
+            self._set_item(solids, chk_path + ('solids',), solid_name, {})
         return self
 
     def _key_check(self, key_list, chk_dict=None):
@@ -107,7 +176,7 @@ class EnvironmentDict:
         """
         return self._name_check(resource_name, 'resources')
 
-    def add_solid_input(self, solid_name, input_name, value, is_kwargs=False, chk_dict=None):
+    def add_solid_input(self, solid_name, input_name, value, is_kwargs=False, chk_dict=None, chk_path=()):
         """
         Add an input to a solid to the environment dictionary
         :param solid_name: name of solid
@@ -115,6 +184,7 @@ class EnvironmentDict:
         :param value: value to set for input
         :param is_kwargs: flag to indicate if input is a kwargs
         :param chk_dict: environment dict to use
+        :param chk_path: tuple of keys from the top of the environment dictionary to chk_dict
         """
         # add_solid_input('read_csv', 'csv_path', 'cereal.csv')
         # results in
@@ -131,24 +201,103 @@ class EnvironmentDict:
         if name_check == EnvironmentDict._VALID or name_check == EnvironmentDict._EXISTS:
             if chk_dict is None:
                 chk_dict = self._e_dict
+            solids = self._get_child(chk_dict, chk_path, 'solids')
+            solid_path = chk_path + ('solids', solid_name)
             if name_check == EnvironmentDict._VALID:
-                chk_dict['solids'][solid_name] = {'inputs': {}}
-            EnvironmentDict.__add_solid_input(chk_dict['solids'][solid_name]['inputs'],
-                                              input_name, value, is_kwargs=is_kwargs)
+                self._set_item(solids, solid_path[:-1], solid_name, {'inputs': {}})
+            self.__add_solid_input(self._get_child(solids[solid_name], solid_path, 'inputs'), solid_path + ('inputs',),
+                                   input_name, value, is_kwargs=is_kwargs)
+        return self
+
+    def add_solid_inputs(self, inputs, is_kwargs=False):
+        """
+        Add multiple inputs to solids, including the child solids of composite solids, in a single pass
+        :param inputs: iterable of (solid path, input name, value) tuples, or mapping of solid path to a dict of
+                        input name to value. A solid path is a solid name, or a tuple of solid names from the top-level
+                        composite solid to the child solid, e.g. ('load_cereals', 'read_cereals')
+        :param is_kwargs: flag to indicate if inputs are kwargs
+        """
+        # add_solid_inputs([('read_csv', 'csv_path', 'cereal.csv'),
+        #                   (('load_cereals', 'read_cereals'), 'csv_path', 'cereal.csv')])
+        # results in
+        # environment_dict = {
+        #     'solids': {
+        #         'read_csv': {
+        #             'inputs': {
+        #                 'csv_path': {'value': 'cereal.csv'}
+        #             }
+        #         },
+        #         'load_cereals': {
+        #             'solids': {
+        #                 'read_cereals': {
+        #                     'inputs': {
+        #                         'csv_path': {'value': 'cereal.csv'}
+        #                     }
+        #                 }
+        #             }
+        #          }
+        #     }
+        # }
+        if isinstance(inputs, Mapping):
+            inputs = ((solid_path, input_name, value)
+                      for solid_path, solid_inputs in inputs.items()
+                      for input_name, value in solid_inputs.items())
+
+        checked = set()
+        solid_inputs = {}   # inputs dict by solid path
+        for solid_path, input_name, value in inputs:
+            if isinstance(solid_path, str):
+                solid_path = (solid_path,)
+            else:
+                solid_path = tuple(solid_path)
+
+            inputs_dict, inputs_path = solid_inputs.get(solid_path, (None, None))
+            if inputs_dict is None:
+                node = self._e_dict
+                node_path = ()
+                for depth, solid_name in enumerate(solid_path):
+                    if solid_name not in checked:
+                        EnvironmentDict._check_name(solid_name)
+                        checked.add(solid_name)
+                    solids = self._get_child(node, node_path, 'solids')
+                    node_path = node_path + ('solids',)
+                    if solid_name not in solids:
+                        # create the solid complete with its child dict, rather than as an empty dict
+                        child = {'inputs': {}} if depth == len(solid_path) - 1 else {'solids': {}}
+                        self._set_item(solids, node_path, solid_name, child)
+                    node = solids[solid_name]
+                    node_path = node_path + (solid_name,)
+                inputs_dict = self._get_child(node, node_path, 'inputs')
+                inputs_path = node_path + ('inputs',)
+                solid_inputs[solid_path] = (inputs_dict, inputs_path)
+
+            if input_name not in checked:
+                EnvironmentDict._check_name(input_name)
+                checked.add(input_name)
+            self.__add_solid_input(inputs_dict, inputs_path, input_name, value, is_kwargs=is_kwargs)
         return self
 
     @staticmethod
-    def __add_solid_input(solid_inputs, input_name, value, is_kwargs=False):
+    def _check_name(name):
+        """
+        Check a name is valid
+        :param name: name to check
+        """
+        if name is None or len(name) == 0:
+            raise ValueError(f'Invalid name: {name}')
+
+    def __add_solid_input(self, solid_inputs, inputs_path, input_name, value, is_kwargs=False):
         """
         Add an input to a solid to the environment dictionary
         :param solid_inputs: inputs dict of solid
+        :param inputs_path: tuple of keys from the top of the environment dictionary to solid_inputs
         :param input_name: name of input to add to solid
         :param value: value to set for input
         """
         if is_kwargs:
-            solid_inputs[input_name] = value
+            self._set_item(solid_inputs, inputs_path, input_name, value)
         else:
-            solid_inputs[input_name] = {'value': value}
+            self._set_item(solid_inputs, inputs_path, input_name, {'value': value})
 
     def add_composite_solid(self, solid_name, child_solid_name):
         """
@@ -170,11 +319,12 @@ class EnvironmentDict:
         # }
         name_check = self._solid_name_check(solid_name)
         if name_check == EnvironmentDict._VALID or name_check == EnvironmentDict._EXISTS:
+            solids = self._get_child(self._e_dict, (), 'solids')
             if name_check == EnvironmentDict._VALID:
-                self._e_dict['solids'][solid_name] = {'solids': {}}
+                self._set_item(solids, ('solids',), solid_name, {'solids': {}})
 
-            composite_dict = self._e_dict['solids'][solid_name]
-            self.__add_solid(child_solid_name, chk_dict=composite_dict)
+            composite_dict = solids[solid_name]
+            self.__add_solid(child_solid_name, chk_dict=composite_dict, chk_path=('solids', solid_name))
         return self
 
     def add_composite_solid_input(self, solid_name, child_solid_name, input_name, value, is_kwargs=False):
@@ -202,11 +352,13 @@ class EnvironmentDict:
         # }
         name_check = self._solid_name_check(solid_name)
         if name_check == EnvironmentDict._VALID or name_check == EnvironmentDict._EXISTS:
+            solids = self._get_child(self._e_dict, (), 'solids')
             if name_check == EnvironmentDict._VALID:
-                self._e_dict['solids'][solid_name] = {'solids': {}}
+                self._set_item(solids, ('solids',), solid_name, {'solids': {}})
 
-            composite_dict = self._e_dict['solids'][solid_name]
-            self.add_solid_input(child_solid_name, input_name, value, is_kwargs=is_kwargs, chk_dict=composite_dict)
+            composite_dict = solids[solid_name]
+            self.add_solid_input(child_solid_name, input_name, value, is_kwargs=is_kwargs, chk_dict=composite_dict,
+                                 chk_path=('solids', solid_name))
         return self
 
     def add_resource(self, resource_name, value):
@@ -217,15 +369,62 @@ class EnvironmentDict:
         """
         name_check = self._resource_name_check(resource_name)
         if name_check == EnvironmentDict._VALID or name_check == EnvironmentDict._EXISTS:
-            self._e_dict['resources'][resource_name] = value
+            resources = self._get_child(self._e_dict, (), 'resources')
+            self._set_item(resources, ('resources',), resource_name, value)
         return self
 
-    def build(self):
+    def build(self, deep=False):
+        """
+        Build the environment dictionary
+        :param deep: return a deep copy, which shares no objects with this builder; default is a shallow copy
+        :return: environment dictionary
+        """
+        if deep:
+            return copy.deepcopy(self._e_dict)
         return self._e_dict.copy()
 
+    def template(self):
+        """
+        Create a template from the environment dictionary, with TemplateParam values as parameters
+        :return: template
+        :rtype: EnvironmentTemplate
+        """
+        # add_solid_input('read_csv', 'csv_path', TemplateParam('path')).template().render({'path': 'cereal.csv'})
+        # results in the same environment_dict as add_solid_input('read_csv', 'csv_path', 'cereal.csv').build()
+        return EnvironmentTemplate(self._e_dict)
+
     def clear(self):
+        self._hash = 0
         return self._e_dict.clear()
 
+    def content_hash(self):
+        """
+        Get the content hash of the environment dictionary. The hash is independent of the order in which entries
+        were added, and is maintained as entries are added, so is not recalculated on each call.
+        Values must not be modified after being added, otherwise the hash will not reflect the modification.
+        :return: hex digest
+        """
+        return f'{self._hash:064x}'
+
+    def to_json(self, **kwargs):
+        """
+        Serialise the environment dictionary to canonical json, with sorted keys and no whitespace
+        :param kwargs: additional arguments as specified by json.dumps()
+        :return: json string
+        """
+        return json.dumps(self._e_dict, sort_keys=True, separators=(',', ':'), **kwargs)
+
+    def to_yaml(self, **kwargs):
+        """
+        Serialise the environment dictionary to yaml, with sorted keys
+        :param kwargs: additional arguments as specified by yaml.dump()
+        :return: yaml string
+        """
+        import yaml
+        # use the libyaml based dumper if available
+        dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+        return yaml.dump(self._e_dict, Dumper=dumper, sort_keys=True, default_flow_style=False, **kwargs)
+
     def __str__(self):
         return pprint.pformat(self._e_dict)
 
@@ -0,0 +1,101 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import copy
+
+
+class TemplateParam(object):
+    """
+    Placeholder for a parameterised value in an environment dictionary template
+    """
+
+    def __init__(self, name):
+        """
+        Initialise object
+        :param name: name of parameter
+        """
+        self.name = name
+
+    def __repr__(self):
+        return f'TemplateParam({self.name!r})'
+
+
+class EnvironmentTemplate(object):
+    """
+    Dagster environment dictionary template, from which environment dictionaries for different parameter values are
+    generated. Generated dictionaries share all the parts of the template which don't contain parameters, so they
+    should be treated as read-only.
+    """
+
+    def __init__(self, e_dict):
+        """
+        Initialise object
+        :param e_dict: environment dictionary containing TemplateParam values
+        """
+        self._base = copy.deepcopy(e_dict)
+        self._params = []   # list of (key path, parameter name)
+        self._find_params(self._base, ())
+        self.param_names = frozenset([name for _, name in self._params])
+
+    def _find_params(self, node, key_path):
+        """
+        Find the parameters in a dictionary
+        :param node: dict or list to search
+        :param key_path: keys from the top of the dictionary to node
+        """
+        items = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, value in items:
+            if isinstance(value, TemplateParam):
+                self._params.append((key_path + (key,), value.name))
+            elif isinstance(value, (dict, list)):
+                self._find_params(value, key_path + (key,))
+
+    def render(self, values):
+        """
+        Generate an environment dictionary, copying only the parts of the template which contain parameters
+        :param values: dict of parameter name to value
+        :return: environment dictionary
+        """
+        missing = self.param_names.difference(values.keys())
+        if len(missing) > 0:
+            raise ValueError(f'Missing template parameters: {sorted(missing)}')
+
+        e_dict = copy.copy(self._base)
+        for key_path, name in self._params:
+            node = e_dict
+            base_node = self._base
+            for key in key_path[:-1]:
+                base_node = base_node[key]
+                if node[key] is base_node:
+                    # still shared with the template, so copy on write
+                    node[key] = copy.copy(base_node)
+                node = node[key]
+            node[key_path[-1]] = values[name]
+        return e_dict
+
+    def iter_render(self, values_iter):
+        """
+        Generate environment dictionaries on demand, e.g. for the partitions of a backfill
+        :param values_iter: iterable of dicts of parameter name to value
+        :return: generator of environment dictionaries
+        """
+        for values in values_iter:
+            yield self.render(values)
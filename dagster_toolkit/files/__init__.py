@@ -19,11 +19,20 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .read_csv_node import load_csv
+from dagster_toolkit.lazy import install_lazy_attributes
+
+# attributes are imported from their submodules on first access, so only the dependencies which are used get loaded
+install_lazy_attributes(__name__, {
+    'load_csv': '.read_csv_node',
+    'stream_csv': '.read_csv_node',
+    'load_csv_files': '.read_csv_node',
+})
 
 
 # if somebody does "from dagster_toolkit.files import *", this is what they will
 # be able to access:
 __all__ = [
     'load_csv',
+    'stream_csv',
+    'load_csv_files',
 ]
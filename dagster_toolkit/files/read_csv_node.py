@@ -19,8 +19,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import pandas as pd
+import glob
+import hashlib
+import json
 import os.path as path
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import pandas as pd
 from dagster import (
     solid,
     Field,
@@ -29,14 +35,120 @@ from dagster import (
     Any,
     List,
     Dict,
+    Int,
+    Float,
     InputDefinition,
     OutputDefinition,
-    Output
+    Output,
+    DynamicOutput,
+    DynamicOutputDefinition,
+    Enum,
+    EnumValue,
+    Noneable,
+    Failure,
+    ExpectationResult
 )
 from dagster_pandas import DataFrame
+from ..utils import DataFrameCache, SolidMetrics, compact_dataframe
+
+
+def csv_file_stat(csv_path: String) -> List:
+    """
+    Get the size and modification time of a csv file, which identify the version of the file
+    :param csv_path: path to io file
+    :return: list of [size in bytes, modification time]
+    """
+    return [path.getsize(csv_path), path.getmtime(csv_path)]
 
 
-@solid()
+def csv_cache_key(csv_path: String, kwargs: Dict, options: Dict = None) -> String:
+    """
+    Generate the cache key for a csv file, which changes whenever the file is modified
+    :param csv_path: path to io file
+    :param kwargs: dictionary of arguments as specified by the pandas.read_csv() function
+    :param options: dictionary of other options affecting the loaded DataFrame
+    :return: key
+    """
+    stat = csv_file_stat(csv_path)
+    fingerprint = json.dumps([path.abspath(csv_path), stat, kwargs, options], sort_keys=True, default=str)
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+
+def read_csv(context, csv_path: String, kwargs: Dict, metrics: SolidMetrics = None) -> DataFrame:
+    """
+    Load csv file using the engine and compaction specified in the solid configuration
+    :param context: execution context
+    :param csv_path: path to io file
+    :param kwargs: dictionary of arguments as specified by the pandas.read_csv() function
+    :param metrics: metrics to record the read and compact phases in; default is None
+    :return: panda DataFrame of data from csv file
+    """
+    if metrics is None:
+        metrics = SolidMetrics()
+
+    engine = context.solid_config['engine']
+    if engine is not None:
+        kwargs = dict(kwargs, engine=engine)
+
+    # https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_csv.html#pandas.read_csv
+    with metrics.phase('read') as phase:
+        df = pd.read_csv(csv_path, **kwargs)
+    phase.add(nbytes=path.getsize(csv_path), df=df)
+
+    if context.solid_config['compact']:
+        before = phase.memory
+        with metrics.phase('compact') as phase:
+            df = compact_dataframe(df, category_max_ratio=context.solid_config['category_max_ratio'])
+        phase.add(df=df)
+        after = phase.memory
+        context.log.info(f'Compacted from {before} to {after} bytes ({after / max(before, 1):.1%})')
+
+    return df
+
+
+@solid(config_schema={
+           'engine': Field(
+               Noneable(Enum('CsvEngine', [
+                   EnumValue('c', description='pandas C parser'),
+                   EnumValue('python', description='pandas python parser'),
+                   EnumValue('pyarrow', description='Multithreaded pyarrow parser; requires pandas 1.4 or later'),
+               ])),
+               default_value=None,
+               is_required=False,
+               description='Parser engine; default is as specified in kwargs, or the pandas default',
+           ),
+           'compact': Field(
+               Bool,
+               default_value=False,
+               is_required=False,
+               description='Downcast numeric columns to the smallest type which can represent all values exactly; '
+                           'integers are only downcast to signed types',
+           ),
+           'category_max_ratio': Field(
+               Noneable(Float),
+               default_value=None,
+               is_required=False,
+               description='When compacting, convert text columns with a ratio of unique values to rows no greater '
+                           'than this to categories',
+           ),
+           'cache': Field(
+               {
+                   'cache_dir': Field(String, description='Path to cache directory'),
+                   'max_size': Field(Int, default_value=10 * 1024 ** 3, is_required=False,
+                                     description='Maximum total size in bytes of cached files'),
+                   'format': Field(
+                       Enum('CsvCacheFormat', [EnumValue('feather'), EnumValue('parquet')]),
+                       default_value='feather',
+                       is_required=False,
+                       description='Cache file format; feather files are memory mapped',
+                   ),
+               },
+               is_required=False,
+               description='Enables caching of loaded files in a columnar format',
+           )
+       },
+       output_defs=[OutputDefinition(DataFrame)]
+       )
 def load_csv(context, csv_path: String, kwargs: Dict) -> DataFrame:
     """
     Load csv file and convert into a panda DataFrame
@@ -49,9 +161,198 @@ def load_csv(context, csv_path: String, kwargs: Dict) -> DataFrame:
     if not path.exists(csv_path):
         raise ValueError(f'Invalid csv file path: {csv_path}')
 
-    # https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_csv.html#pandas.read_csv
-    df = pd.read_csv(csv_path, **kwargs)
+    metrics = SolidMetrics()
 
-    context.log.info(f'Loaded {len(df)} entries from {csv_path}')
+    cache_cfg = context.solid_config.get('cache')
+    if cache_cfg is None:
+        df = read_csv(context, csv_path, kwargs, metrics)
 
-    return df
+        context.log.info(f'Loaded {len(df)} entries from {csv_path}')
+
+        metrics.log(context)
+        yield Output(df, metadata=metrics.metadata())
+        return
+
+    cache = DataFrameCache(cache_cfg['cache_dir'], max_size=cache_cfg['max_size'], file_format=cache_cfg['format'])
+    stat = csv_file_stat(csv_path)
+    key = csv_cache_key(csv_path, kwargs, {
+        option: context.solid_config[option] for option in ['engine', 'compact', 'category_max_ratio']
+    })
+
+    start = perf_counter()
+    with metrics.phase('cache') as phase:
+        df, meta = cache.get(key)
+    if df is not None:
+        phase.add(df=df)
+        elapsed = perf_counter() - start
+        context.log.info(f'Loaded {len(df)} entries from cache for {csv_path}, '
+                         f'saved {meta["elapsed"] - elapsed:.3f}s')
+        metrics.log(context)
+        yield Output(df, metadata=dict(metrics.metadata(), **{
+            'cache': 'hit',
+            'cache_key': key,
+            'saved_seconds': meta['elapsed'] - elapsed,
+        }))
+    else:
+        df = read_csv(context, csv_path, kwargs, metrics)
+        elapsed = perf_counter() - start
+
+        context.log.info(f'Loaded {len(df)} entries from {csv_path}')
+
+        # remove cached copies of previous versions of the file, keeping those of this version loaded with other
+        # arguments or options
+        tag = path.abspath(csv_path)
+        cache.invalidate(tag, keep={'file_stat': stat})
+        try:
+            cache.put(key, df, tags=[tag], elapsed=elapsed, file_stat=stat)
+        except Exception as e:
+            # caching is best-effort, the file has been loaded
+            context.log.warning(f'Unable to cache {csv_path}: {e}')
+        metrics.log(context)
+        yield Output(df, metadata=dict(metrics.metadata(), **{
+            'cache': 'miss',
+            'cache_key': key,
+            'load_seconds': elapsed,
+        }))
+
+
+@solid(config_schema={
+           'chunksize': Field(
+               Int,
+               default_value=100000,
+               is_required=False,
+               description='Number of rows per DataFrame chunk',
+           )
+       },
+       output_defs=[DynamicOutputDefinition(DataFrame)]
+       )
+def stream_csv(context, csv_path: String, kwargs: Dict):
+    """
+    Load csv file as a dynamic output of panda DataFrame chunks, so memory usage is bounded by the chunk size rather
+    than the file size
+    :param context: execution context
+    :param csv_path: path to io file
+    :param kwargs: dictionary of arguments as specified by the pandas.read_csv() function; 'chunksize' and 'iterator'
+                    are ignored
+    :return: dynamic output of panda DataFrame chunks
+    """
+    # verify csv path
+    if not path.exists(csv_path):
+        raise ValueError(f'Invalid csv file path: {csv_path}')
+
+    kwargs = {key: value for key, value in kwargs.items() if key not in ['chunksize', 'iterator']}
+    size = path.getsize(csv_path)
+    rows = 0
+
+    metrics = SolidMetrics()
+
+    with open(csv_path, 'rb') as fhandle:
+        # https://pandas.pydata.org/pandas-docs/stable/user_guide/io.html#io-chunking
+        reader = pd.read_csv(fhandle, chunksize=context.solid_config['chunksize'], **kwargs)
+        position = 0
+        index = 0
+        while True:
+            with metrics.phase('read') as phase:
+                df = next(reader, None)
+            if df is None:
+                break
+            rows += len(df)
+            # the parser reads ahead, so the byte counts are approximate
+            read = fhandle.tell() - position
+            position += read
+            phase.add(nbytes=read, df=df)
+
+            context.log.info(f'Chunk {index}: loaded {len(df)} entries, {read} bytes, '
+                             f'{rows} entries and {position} of {size} bytes in total')
+
+            yield DynamicOutput(df, mapping_key=f'chunk_{index}')
+            index += 1
+
+    context.log.info(f'Loaded {rows} entries from {csv_path}')
+
+    metrics.log(context)
+    yield ExpectationResult(success=True, label='performance', description='Streaming csv performance',
+                            metadata=metrics.metadata())
+
+
+def read_csv_file(csv_path: String, kwargs: Dict) -> DataFrame:
+    """
+    Load csv file into a panda DataFrame, for use in worker processes
+    :param csv_path: path to io file
+    :param kwargs: dictionary of arguments as specified by the pandas.read_csv() function
+    :return: panda DataFrame of data from csv file
+    """
+    return pd.read_csv(csv_path, **kwargs)
+
+
+@solid(config_schema={
+           'fatal': Field(
+               Bool,
+               default_value=True,
+               is_required=False,
+               description='Controls whether a file which fails to load causes a Failure or is skipped',
+           ),
+           'workers': Field(
+               Noneable(Int),
+               default_value=None,
+               is_required=False,
+               description='Number of worker processes; default is the number of processors',
+           ),
+           'source_column': Field(
+               Noneable(String),
+               default_value=None,
+               is_required=False,
+               description='Name of column to add with the path of the file each row was loaded from',
+           )
+       },
+       output_defs=[OutputDefinition(DataFrame)]
+       )
+def load_csv_files(context, csv_paths: Any, kwargs: Dict) -> DataFrame:
+    """
+    Load multiple csv files in parallel and concatenate them into a panda DataFrame
+    :param context: execution context
+    :param csv_paths: glob pattern or list of paths to io files
+    :param kwargs: dictionary of arguments as specified by the pandas.read_csv() function
+    :return: panda DataFrame of data from csv files
+    """
+    if isinstance(csv_paths, str):
+        paths = sorted(glob.glob(csv_paths))
+        context.log.info(f"{len(paths)} files match '{csv_paths}'")
+    else:
+        paths = list(csv_paths)
+
+    source_column = context.solid_config['source_column']
+
+    metrics = SolidMetrics()
+
+    dfs = []
+    errors = []
+    with metrics.phase('read') as phase, ProcessPoolExecutor(max_workers=context.solid_config['workers']) as executor:
+        futures = [executor.submit(read_csv_file, csv_path, kwargs) for csv_path in paths]
+
+        # wait for all files before failing, so one failure doesn't hide the others
+        for csv_path, future in zip(paths, futures):
+            try:
+                df = future.result()
+            except Exception as e:
+                context.log.error(f'Error loading {csv_path}: {e}')
+                errors.append(f'{csv_path}: {e}')
+                continue
+
+            context.log.info(f'Loaded {len(df)} entries from {csv_path}')
+            phase.add(rows=len(df), nbytes=path.getsize(csv_path))
+            if source_column is not None:
+                df[source_column] = csv_path
+            dfs.append(df)
+
+    if len(errors) > 0 and context.solid_config['fatal']:
+        raise Failure(f'{len(errors)} of {len(paths)} files failed to load: ' + '; '.join(errors))
+
+    with metrics.phase('concat') as phase:
+        df = pd.concat(dfs, ignore_index=True) if len(dfs) > 0 else pd.DataFrame()
+    phase.add(df=df)
+
+    context.log.info(f'Loaded {len(df)} entries from {len(dfs)} files')
+
+    metrics.log(context)
+    yield Output(df, metadata=metrics.metadata())
@@ -0,0 +1,60 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module whose attributes are imported from its submodules on first access
+    """
+
+    def __getattr__(self, name):
+        # only called if name isn't already an attribute
+        lazy_attrs = self.__dict__.get('_lazy_attrs', {})
+        if name not in lazy_attrs:
+            raise AttributeError(f'module {self.__name__!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(lazy_attrs[name], self.__name__), name)
+        super().__setattr__(name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        # the import system sets a submodule as an attribute of its package when it is loaded, which would hide a
+        # lazy attribute with the same name, e.g. the create_table solid in the postgres.create_table submodule
+        if isinstance(value, types.ModuleType) and name in self.__dict__.get('_lazy_attrs', {}):
+            return
+        super().__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()).union(self.__dict__.get('_lazy_attrs', {}).keys()))
+
+
+def install_lazy_attributes(module_name, lazy_attrs):
+    """
+    Make the attributes of a module load lazily from its submodules
+    :param module_name: name of module, i.e. __name__
+    :param lazy_attrs: dict of attribute name to the relative name of the module defining it
+    """
+    module = sys.modules[module_name]
+    module._lazy_attrs = lazy_attrs
+    module.__class__ = LazyModule
@@ -19,8 +19,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .connection import mongo_warehouse_resource
-from .download_node import download_from_mongo
+from dagster_toolkit.lazy import install_lazy_attributes
+
+# attributes are imported from their submodules on first access, so only the dependencies which are used get loaded
+install_lazy_attributes(__name__, {
+    'mongo_warehouse_resource': '.connection',
+    'download_from_mongo': '.download_node',
+    'stream_from_mongo': '.download_node',
+    'advance_watermark': '.download_node',
+    'aggregate_from_mongo': '.aggregate_node',
+})
 
 
 # if somebody does "from dagster_toolkit.mongo import *", this is what they will
@@ -28,4 +36,7 @@ from .download_node import download_from_mongo
 __all__ = [
     'mongo_warehouse_resource',
     'download_from_mongo',
+    'stream_from_mongo',
+    'advance_watermark',
+    'aggregate_from_mongo',
 ]
@@ -0,0 +1,81 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from dagster import solid, Field, Int, Bool, Output
+from .download_node import cursor_to_dataframe
+from ..utils import SolidMetrics
+
+
+@solid(required_resource_keys={'mongo_warehouse'},
+       config_schema={
+           'allow_disk_use': Field(
+               Bool,
+               default_value=True,
+               is_required=False,
+               description='Allow pipeline stages to write temporary data to disk on the server',
+           ),
+           'batch_size': Field(
+               Int,
+               default_value=10000,
+               is_required=False,
+               description='Number of result documents converted to a DataFrame at a time',
+           )
+       }
+       )
+def aggregate_from_mongo(context, pipeline):
+    """
+    Run an aggregation pipeline on a mongoDB server and download the result to a panda DataFrame
+    :param context: execution context
+    :param pipeline: a list of aggregation pipeline stages
+    :return: panda DataFrame or None
+    :rtype: panda.DataFrame
+    """
+    df = None
+
+    metrics = SolidMetrics()
+
+    with metrics.phase('connect'):
+        client = context.resources.mongo_warehouse.get_connection(context)
+
+    if client is not None:
+        # get database collection
+        collection = client.get_collection()
+
+        batch_size = context.solid_config['batch_size']
+
+        # https://api.mongodb.com/python/current/api/pymongo/collection.html#pymongo.collection.Collection.aggregate
+        context.log.info(f'Aggregation in progress, {len(pipeline)} stages')
+        with metrics.phase('execute'):
+            cursor = collection.aggregate(pipeline, allowDiskUse=context.solid_config['allow_disk_use'],
+                                          batchSize=batch_size)
+
+        try:
+            df = cursor_to_dataframe(context, cursor, batch_size, metrics)
+        finally:
+            # tidy up
+            cursor.close()
+            context.resources.mongo_warehouse.release_connection(context, client)
+
+        context.log.info(f'Loaded {len(df)} records')
+
+        metrics.log(context)
+
+    yield Output(df, metadata=metrics.metadata())
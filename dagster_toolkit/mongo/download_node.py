@@ -19,11 +19,253 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from dagster import solid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from numbers import Number
+
+from bson import ObjectId
+from dagster import (
+    solid, Field, Int, String, Enum, EnumValue, DynamicOutput, DynamicOutputDefinition, Output, ExpectationResult,
+    OutputDefinition, InputDefinition, Nothing
+)
 import pandas as pd
+from .watermark import WatermarkStore, include_field, python_value
+from ..utils import SolidMetrics, approximate_size
+
+
+def iter_document_batches(cursor, batch_size):
+    """
+    Iterate over the documents of a cursor in batches
+    :param cursor: cursor to read
+    :param batch_size: number of documents per batch
+    :return: generator of lists of documents
+    """
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+
+def iter_dataframe_batches(context, cursor, batch_size, metrics=None):
+    """
+    Iterate over the documents of a cursor as DataFrames, so only one batch of documents is held at a time
+    :param context: execution context
+    :param cursor: cursor to read
+    :param batch_size: number of documents per batch
+    :param metrics: SolidMetrics to record the fetch and build phases in; default is None
+    :return: generator of panda DataFrames
+    """
+    if metrics is None:
+        metrics = SolidMetrics()
+    # match the server batch size to the DataFrame batch size
+    cursor.batch_size(batch_size)
+    batches = iter_document_batches(cursor, batch_size)
+    count = 0
+    index = 0
+    while True:
+        with metrics.phase('fetch') as phase:
+            batch = next(batches, None)
+        if batch is None:
+            break
+        phase.add(rows=len(batch), nbytes=approximate_size(batch))
+
+        with metrics.phase('build') as phase:
+            df = pd.DataFrame.from_dict(batch)
+        phase.add(df=df)
+        count += len(df)
+        context.log.info(f'Batch {index}: loaded {len(df)} documents, {count} in total')
+        index += 1
+        yield df
+
+
+def cursor_to_dataframe(context, cursor, batch_size, metrics=None):
+    """
+    Load the documents of a cursor into a DataFrame
+    :param context: execution context
+    :param cursor: cursor to read
+    :param batch_size: number of documents converted to a DataFrame at a time, or 0 to convert all documents at once
+    :param metrics: SolidMetrics to record the fetch and build phases in; default is None
+    :return: panda DataFrame
+    :rtype: panda.DataFrame
+    """
+    if metrics is None:
+        metrics = SolidMetrics()
+    if batch_size > 0:
+        dfs = list(iter_dataframe_batches(context, cursor, batch_size, metrics))
+        with metrics.phase('concat'):
+            df = pd.concat(dfs, ignore_index=True) if len(dfs) > 0 else pd.DataFrame()
+    else:
+        with metrics.phase('fetch') as phase:
+            entries = list(cursor)
+        phase.add(rows=len(entries), nbytes=approximate_size(entries))
+        context.log.info(f'{len(entries)} documents retrieved')
+
+        context.log.info(f'DataFrame loading in progress')
+        with metrics.phase('build') as phase:
+            df = pd.DataFrame.from_dict(entries)
+        phase.add(df=df)
+    return df
+
+
+def interpolate_bounds(low, high, partitions):
+    """
+    Split the range between two values into equal partitions
+    :param low: lowest value
+    :param high: highest value
+    :param partitions: number of partitions
+    :return: list of partitions + 1 bounds
+    """
+    if isinstance(low, ObjectId) and isinstance(high, ObjectId):
+        # split on the ObjectId timestamps
+        bounds = interpolate_bounds(low.generation_time, high.generation_time, partitions)
+        return [low] + [ObjectId.from_datetime(bound) for bound in bounds[1:-1]] + [high]
+    if isinstance(low, (Number, datetime)) and isinstance(high, (Number, datetime)) and \
+            not isinstance(low, bool) and not isinstance(high, bool):
+        step = (high - low) / partitions
+        return [low] + [low + step * index for index in range(1, partitions)] + [high]
+    raise ValueError(f'Unable to interpolate between {type(low).__name__} and {type(high).__name__} values, '
+                     f'use the bucket_auto split method')
+
+
+def partition_bounds(collection, sel_filter, field, partitions, split_method):
+    """
+    Get the bounds of the partitions of the documents matching a filter
+    :param collection: collection to partition
+    :param sel_filter: filter documents must match
+    :param field: indexed field to partition on
+    :param partitions: number of partitions
+    :param split_method: 'bucket_auto' to use $bucketAuto to split into partitions of approximately equal size, or
+                        'min_max' to split the range between the minimum and maximum values into equal ranges
+    :return: list of bounds, empty if no documents match
+    """
+    match = sel_filter if sel_filter is not None else {}
+    if split_method == 'bucket_auto':
+        # https://docs.mongodb.com/manual/reference/operator/aggregation/bucketAuto/
+        buckets = list(collection.aggregate([
+            {'$match': match},
+            {'$bucketAuto': {'groupBy': f'${field}', 'buckets': partitions}}
+        ], allowDiskUse=True))
+        bounds = [bucket['_id']['min'] for bucket in buckets]
+        if len(buckets) > 0:
+            bounds.append(buckets[-1]['_id']['max'])
+    else:
+        match = {'$and': [match, {field: {'$exists': True}}]}
+        low = list(collection.find(match, projection={field: True}).sort(field, 1).limit(1))
+        high = list(collection.find(match, projection={field: True}).sort(field, -1).limit(1))
+        if len(low) > 0:
+            bounds = interpolate_bounds(low[0][field], high[0][field], partitions)
+        else:
+            bounds = []
+    return bounds
+
+
+def partition_filters(sel_filter, field, bounds):
+    """
+    Get the filters for the partitions of the documents matching a filter
+    :param sel_filter: filter documents must match
+    :param field: field to partition on
+    :param bounds: list of partition bounds
+    :return: list of filters; each partition includes its lower bound, and the last partition its upper bound
+    """
+    filters = []
+    for index in range(len(bounds) - 1):
+        upper = '$lte' if index == len(bounds) - 2 else '$lt'
+        partition = {field: {'$gte': bounds[index], upper: bounds[index + 1]}}
+        filters.append({'$and': [sel_filter, partition]} if sel_filter else partition)
+    return filters
+
+
+def __download_partitioned(context, collection, sel_filter, projection, metrics):
+    """
+    Download the documents matching a filter as concurrently read range partitions
+    :param context: execution context
+    :param collection: collection to read
+    :param sel_filter: filter documents must match
+    :param projection: fields to return
+    :param metrics: SolidMetrics to record the phases in; phase times are totalled across partitions
+    :return: panda DataFrame
+    :rtype: panda.DataFrame
+    """
+    partitions = context.solid_config['partitions']
+    field = context.solid_config['partition_field']
+    batch_size = context.solid_config['batch_size']
+
+    with metrics.phase('partition'):
+        bounds = partition_bounds(collection, sel_filter, field, partitions, context.solid_config['split_method'])
+    filters = partition_filters(sel_filter, field, bounds)
+
+    context.log.info(f"Document retrieval in progress, {len(filters)} partitions on '{field}'")
+
+    def download_partition(partition_filter):
+        cursor = collection.find(filter=partition_filter, projection=projection)
+        try:
+            return cursor_to_dataframe(context, cursor, batch_size, metrics)
+        finally:
+            cursor.close()
+
+    if len(filters) > 0:
+        with ThreadPoolExecutor(max_workers=len(filters)) as executor:
+            dfs = list(executor.map(download_partition, filters))
+        with metrics.phase('concat'):
+            df = pd.concat(dfs, ignore_index=True)
+    else:
+        df = pd.DataFrame()
+    return df
 
 
-@solid(required_resource_keys={'mongo_warehouse'})
+@solid(required_resource_keys={'mongo_warehouse'},
+       config_schema={
+           'batch_size': Field(
+               Int,
+               default_value=0,
+               is_required=False,
+               description='Number of documents converted to a DataFrame at a time, or 0 to convert all '
+                           'documents at once',
+           ),
+           'partitions': Field(
+               Int,
+               default_value=1,
+               is_required=False,
+               description='Number of range partitions to read concurrently; documents without the partition '
+                           'field are not included when greater than 1',
+           ),
+           'partition_field': Field(
+               String,
+               default_value='_id',
+               is_required=False,
+               description='Indexed field to partition on',
+           ),
+           'split_method': Field(
+               Enum('SplitMethod', [
+                   EnumValue('bucket_auto', description='Partitions of approximately equal size, using $bucketAuto'),
+                   EnumValue('min_max', description='Equal ranges between the minimum and maximum values'),
+               ]),
+               default_value='bucket_auto',
+               is_required=False,
+               description='Method used to determine the partition bounds',
+           ),
+           'incremental': Field(
+               {
+                   'state_dir': Field(String, description='Path to high-water mark state directory'),
+                   'state_key': Field(String, description='Name of the high-water mark'),
+                   'field': Field(String, default_value='_id', is_required=False,
+                                  description='Indexed field which increases for new or changed documents'),
+               },
+               is_required=False,
+               description='Enables incremental extraction of the documents added or changed since the mark was '
+                           'last advanced by advance_watermark()',
+           )
+       },
+       output_defs=[
+           OutputDefinition(name='result'),
+           OutputDefinition(name='watermark', is_required=False,
+                            description='New high-water mark for advance_watermark(), if documents were retrieved'),
+       ]
+       )
 def download_from_mongo(context, sel_filter, projection):
     """
     Download panda DataFrame from a mongoDB server
@@ -33,33 +275,134 @@ def download_from_mongo(context, sel_filter, projection):
     :param projection: a list of field names that should be returned in the result set or a dict specifying the fields
                         to include or exclude. If projection is a list “_id” will always be returned.
                         Use a dict to exclude fields from the result (e.g. projection={‘_id’: False}).
-    :return: panda DataFrame or None
+    :return: panda DataFrame or None, and in incremental mode the new high-water mark as the 'watermark' output
     :rtype: panda.DataFrame
     """
     df = None
+    watermark = None
+
+    metrics = SolidMetrics()
 
-    client = context.resources.mongo_warehouse.get_connection(context)
+    with metrics.phase('connect'):
+        client = context.resources.mongo_warehouse.get_connection(context)
 
     if client is not None:
         # get database collection
         collection = client.get_collection()
 
-        # retrieve a cursor for required records
-        # https://api.mongodb.com/python/current/api/pymongo/collection.html#pymongo.collection.Collection.find
-        context.log.info(f'Document retrieval in progress')
-        cursor = collection.find(filter=sel_filter, projection=projection)
+        incremental = context.solid_config.get('incremental')
+        if incremental is not None:
+            store = WatermarkStore(incremental['state_dir'])
+            field = incremental['field']
+            mark = store.get(incremental['state_key'])
+            if mark is not None:
+                context.log.info(f"Incremental retrieval of documents with '{field}' > {mark}")
+                mark_filter = {field: {'$gt': mark}}
+                sel_filter = {'$and': [sel_filter, mark_filter]} if sel_filter else mark_filter
+            mark_projection = include_field(projection, field)
+            # the field is only needed for the mark if the projection doesn't return it
+            drop_field = mark_projection != projection
+            projection = mark_projection
 
-        entries = list(cursor)
-        context.log.info(f'{len(entries)} documents retrieved')
+        if context.solid_config['partitions'] > 1:
+            df = __download_partitioned(context, collection, sel_filter, projection, metrics)
+        else:
+            # retrieve a cursor for required records
+            # https://api.mongodb.com/python/current/api/pymongo/collection.html#pymongo.collection.Collection.find
+            context.log.info(f'Document retrieval in progress')
+            cursor = collection.find(filter=sel_filter, projection=projection)
 
-        context.log.info(f'DataFrame loading in progress')
-        df = pd.DataFrame.from_dict(entries)
+            df = cursor_to_dataframe(context, cursor, context.solid_config['batch_size'], metrics)
+
+            cursor.close()
 
         # tidy up
-        cursor.close()
-        client.close_connection()
+        context.resources.mongo_warehouse.release_connection(context, client)
 
         context.log.info(f'Loaded {len(df)} records')
 
-    return df
+        if incremental is not None and field in df.columns:
+            # the mark is only advanced by advance_watermark(), once the documents have been processed
+            values = df[field].dropna()
+            if len(values) > 0:
+                watermark = {
+                    'state_dir': incremental['state_dir'],
+                    'state_key': incremental['state_key'],
+                    'mark': python_value(values.max()),
+                }
+                context.log.info(f"High-water mark '{incremental['state_key']}' may be advanced to "
+                                 f"{watermark['mark']}")
+            if drop_field:
+                df = df.drop(columns=[field])
+
+        metrics.log(context)
+
+    yield Output(df, metadata=metrics.metadata())
+    if watermark is not None:
+        yield Output(watermark, output_name='watermark')
+
+
+@solid(input_defs=[
+           InputDefinition('watermark', description="'watermark' output of download_from_mongo()"),
+           InputDefinition('start', Nothing,
+                           description='Solids which must succeed before the mark is advanced'),
+       ]
+       )
+def advance_watermark(context, watermark):
+    """
+    Advance the high-water mark of an incremental download_from_mongo(). Make this solid depend on the solids which
+    process the downloaded documents via its 'start' input, so that if they fail the documents are downloaded again
+    by the next run.
+    :param context: execution context
+    :param watermark: 'watermark' output of download_from_mongo()
+    """
+    WatermarkStore(watermark['state_dir']).set(watermark['state_key'], watermark['mark'])
+    context.log.info(f"High-water mark '{watermark['state_key']}' advanced to {watermark['mark']}")
+
+
+@solid(required_resource_keys={'mongo_warehouse'},
+       config_schema={
+           'batch_size': Field(
+               Int,
+               default_value=10000,
+               is_required=False,
+               description='Number of documents per DataFrame chunk',
+           )
+       },
+       output_defs=[DynamicOutputDefinition()]
+       )
+def stream_from_mongo(context, sel_filter, projection):
+    """
+    Download documents from a mongoDB server as a dynamic output of panda DataFrame chunks
+    :param context: execution context
+    :param sel_filter: a SON object specifying elements which must be present for a document to be included in the
+                        result set
+    :param projection: a list of field names that should be returned in the result set or a dict specifying the fields
+                        to include or exclude. See download_from_mongo().
+    :return: dynamic output of panda DataFrame chunks
+    :rtype: panda.DataFrame
+    """
+    metrics = SolidMetrics()
+
+    with metrics.phase('connect'):
+        client = context.resources.mongo_warehouse.get_connection(context)
+
+    if client is not None:
+        # get database collection
+        collection = client.get_collection()
+
+        context.log.info(f'Document retrieval in progress')
+        cursor = collection.find(filter=sel_filter, projection=projection)
+
+        try:
+            for index, df in enumerate(iter_dataframe_batches(context, cursor, context.solid_config['batch_size'],
+                                                              metrics)):
+                yield DynamicOutput(df, mapping_key=f'batch_{index}')
 
+            metrics.log(context)
+            yield ExpectationResult(success=True, label='performance', description='Streaming download performance',
+                                    metadata=metrics.metadata())
+        finally:
+            # tidy up
+            cursor.close()
+            context.resources.mongo_warehouse.release_connection(context, client)
@@ -0,0 +1,100 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import os.path as path
+from uuid import uuid4
+
+from bson import json_util
+
+
+class WatermarkStore(object):
+    """
+    Local store of incremental extraction high-water marks, with a json file per mark
+    """
+    def __init__(self, state_dir):
+        """
+        Initialise object
+        :param state_dir: path to state directory; created if it doesn't exist
+        """
+        self._state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _path(self, key):
+        return path.join(self._state_dir, f'{key}.json')
+
+    def get(self, key):
+        """
+        Get a high-water mark
+        :param key: mark key
+        :return: mark value or None if not set
+        """
+        try:
+            with open(self._path(key), 'r') as fhandle:
+                return json_util.loads(fhandle.read())['mark']
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, mark):
+        """
+        Atomically set a high-water mark
+        :param key: mark key
+        :param mark: mark value; any BSON type
+        """
+        mark_path = self._path(key)
+        tmp_path = f'{mark_path}.{uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as fhandle:
+            fhandle.write(json_util.dumps({'mark': mark}))
+        os.replace(tmp_path, mark_path)
+
+
+def include_field(projection, field):
+    """
+    Ensure a field is returned by a projection
+    :param projection: a list of field names or a dict specifying the fields to include or exclude
+    :param field: field name
+    :return: updated projection
+    """
+    if projection is None or field == '_id' and not isinstance(projection, dict):
+        pass
+    elif isinstance(projection, dict):
+        if field in projection and not projection[field]:
+            # explicitly excluded
+            projection = {key: value for key, value in projection.items() if key != field}
+        elif any([value for key, value in projection.items() if key != '_id']) and field not in projection:
+            # inclusion projection
+            projection = dict(projection, **{field: True})
+    elif field not in projection:
+        projection = list(projection) + [field]
+    return projection
+
+
+def python_value(value):
+    """
+    Convert a value from a DataFrame to its python equivalent
+    :param value: value to convert
+    :return: converted value
+    """
+    if hasattr(value, 'to_pydatetime'):
+        value = value.to_pydatetime()
+    elif hasattr(value, 'item'):
+        value = value.item()
+    return value
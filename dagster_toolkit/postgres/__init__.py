@@ -19,18 +19,38 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .connection import postgres_warehouse_resource
-from .read_table import query_table
-from .create_table import does_psql_table_exist, create_table
-from .drop_table import drop_table
+from dagster_toolkit.lazy import install_lazy_attributes
+
+# attributes are imported from their submodules on first access, so only the dependencies which are used get loaded
+install_lazy_attributes(__name__, {
+    'postgres_warehouse_resource': '.connection',
+    'postgres_run_warehouse_resource': '.connection',
+    'query_table': '.read_table',
+    'multi_query_table': '.read_table',
+    'stream_query_table': '.read_table',
+    'invalidate_query_cache': '.read_table',
+    'does_psql_table_exist': '.create_table',
+    'create_table': '.create_table',
+    'drop_table': '.drop_table',
+    'ddl_batch': '.ddl_batch',
+    'commit_run_transaction': '.transaction',
+    'load_dataframe': '.load_table',
+})
 
 
 # if somebody does "from dagster_toolkit.postgres import *", this is what they will
 # be able to access:
 __all__ = [
     'postgres_warehouse_resource',
+    'postgres_run_warehouse_resource',
     'query_table',
+    'multi_query_table',
+    'stream_query_table',
+    'invalidate_query_cache',
     'does_psql_table_exist',
     'create_table',
     'drop_table',
+    'ddl_batch',
+    'commit_run_transaction',
+    'load_dataframe',
 ]
@@ -0,0 +1,69 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+
+# user tables and views, excluding the system and temporary schemas, and the existing schemas of the search path,
+# in the order unqualified names are resolved
+CATALOG_SQL = "SELECT table_schema, table_name FROM information_schema.tables " \
+              "WHERE table_schema NOT IN ('pg_catalog', 'information_schema') AND table_schema NOT LIKE 'pg_temp%'"
+SEARCH_PATH_SQL = 'SELECT current_schemas(false)'
+
+# table existence check, resolving the name as Postgres does; the relation kinds are those listed by
+# information_schema.tables, i.e. tables, views, foreign and partitioned tables. The parameter is the table name,
+# optionally schema qualified and/or quoted.
+TABLE_EXISTS_SQL = "SELECT EXISTS (SELECT 1 FROM pg_catalog.pg_class " \
+                   "WHERE oid = to_regclass(%s) AND relkind IN ('r', 'v', 'f', 'p'))"
+
+# quoted or unquoted parts of a schema qualified name
+IDENTIFIER_PART_REGEX = re.compile(r'"((?:[^"]|"")*)"|([^."]+)')
+
+
+def split_table_name(name):
+    """
+    Split a table name into its schema and table names as stored in the catalog; unquoted identifiers are folded to
+    lowercase and quoted identifiers are used exactly, as Postgres does
+    :param name: table name, optionally schema qualified and/or quoted
+    :return: tuple of (schema name or None if unqualified, table name)
+    """
+    parts = [quoted.replace('""', '"') if quoted else unquoted.strip().lower()
+             for quoted, unquoted in IDENTIFIER_PART_REGEX.findall(name)]
+    if len(parts) == 0:
+        raise ValueError(f'Invalid table name: {name}')
+    # a database qualified name is checked in the current database
+    return (parts[-2] if len(parts) > 1 else None), parts[-1]
+
+
+def resolve_table(name, catalog, search_path):
+    """
+    Resolve a table name against a catalog snapshot; unqualified names resolve to the first schema of the search path
+    containing the table, as Postgres does
+    :param name: table name, optionally schema qualified and/or quoted
+    :param catalog: set of (schema name, table name) of the tables
+    :param search_path: list of the schemas of the search path, in order
+    :return: tuple of (schema name, table name), or None if the table doesn't exist
+    """
+    schema, table = split_table_name(name)
+    schemas = [schema] if schema is not None else search_path
+    for schema in schemas:
+        if (schema, table) in catalog:
+            return schema, table
+    return None
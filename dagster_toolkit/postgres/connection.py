@@ -19,6 +19,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import json
+import threading
+from itertools import count
+from time import monotonic
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INERROR
 from db_toolkit.postgres import PostgresDb
 from dagster import (
     Failure,
@@ -27,30 +33,72 @@ from dagster import (
     String,
     Dict,
     Any,
-    Bool
+    Bool,
+    Int,
+    Float,
+    Noneable
 )
+from .pool import get_pool, PoolTimeout
+from .catalog import CATALOG_SQL, SEARCH_PATH_SQL, resolve_table
 
 # see https://docs.dagster.io/tutorial/advanced-tutorial/pipelines#parameterizing-jobs-with-resources
 
+CATALOG_SNAPSHOT_FIELD = Field(
+    {
+        'ttl': Field(Noneable(Float), default_value=None, is_required=False,
+                     description='Maximum age in seconds of the snapshot; default is for the lifetime of the resource'),
+    },
+    is_required=False,
+    description='Enables a snapshot of the table catalog, which answers table existence checks without a query',
+)
+
 
 class PostgresWarehouse(object):
     """
     Postgres data warehouse server object
     """
-    def __init__(self, postgres_cfg, fatal=True):
+    def __init__(self, postgres_cfg, fatal=True, pool_cfg=None, catalog_cfg=None):
         """
         Initialise object
         :param postgres_cfg: path to server configuration file or configuration dict
         :param fatal: Connection failure is fatal flag; default is True
+        :param pool_cfg: connection pool configuration dict, as specified by PostgresPool(), or None to use a new
+                        connection for each request
+        :param catalog_cfg: catalog snapshot configuration dict with optional 'ttl', or None to disable the snapshot
         """
         self._postgres_cfg = postgres_cfg
         self._fatal = fatal
         self.client = None
+        self._server = None
+        self._catalog_cfg = catalog_cfg
+        self._catalog = None
+        self._search_path = None
+        self._catalog_time = None
+        self._catalog_lock = threading.Lock()
+        if pool_cfg is not None:
+            self._pool = get_pool(postgres_cfg, self._open_client, **pool_cfg)
+        else:
+            self._pool = None
 
-    def get_connection(self, context):
+    @property
+    def identity(self):
         """
-        Establish a connection to the Postgres server
-        :param context: execution context
+        Server configuration identity, suitable for use in cache keys
+        :return: identity string
+        """
+        return json.dumps(self._postgres_cfg, sort_keys=True, default=str)
+
+    @property
+    def max_connections(self):
+        """
+        Maximum number of connections which may be in use at once
+        :return: maximum or None if unlimited
+        """
+        return self._pool.max_size if self._pool is not None else None
+
+    def _open_client(self):
+        """
+        Create a server object and establish a connection
         :return: server object or None if unable to connect
         :rtype: PostgresDb
         """
@@ -61,23 +109,146 @@ class PostgresWarehouse(object):
         else:
             raise Failure(f'No configuration provided for PostgresWarehouse')
 
-        server = client['host']
+        self._server = client['host']
 
-        if client.get_connection() is not None:
-            context.log.info(f'Connected to Postgres: {server}')
-        else:
-            context.log.info(f'Unable to connect to Postgres: {server}')
+        if client.get_connection() is None:
             client.close_connection()
-            if self._fatal:
-                raise Failure(f'Unable to connect to Postgres: {server}')
             client = None
 
         return client
 
+    def get_connection(self, context):
+        """
+        Establish a connection to the Postgres server, or check one out of the pool if pooling is enabled.
+        The connection should be returned by calling release_connection().
+        :param context: execution context
+        :return: server object or None if unable to connect
+        :rtype: PostgresDb
+        """
+        if self._pool is None:
+            client = self._open_client()
+            if client is not None:
+                context.log.info(f'Connected to Postgres: {self._server}')
+        else:
+            try:
+                client, wait = self._pool.checkout()
+            except PoolTimeout as e:
+                context.log.info(f'Unable to check out Postgres connection: {e}')
+                if self._fatal:
+                    raise Failure(f'Unable to check out Postgres connection: {e}')
+                return None
+            if client is not None:
+                self._server = client['host']
+                context.log.info(f'Checked out pooled connection to Postgres: {self._server} '
+                                 f'(waited {wait:.3f}s)')
+
+        if client is None:
+            context.log.info(f'Unable to connect to Postgres: {self._server}')
+            if self._fatal:
+                raise Failure(f'Unable to connect to Postgres: {self._server}')
+
+        return client
+
+    def release_connection(self, context, client):
+        """
+        Release a connection obtained from get_connection()
+        :param context: execution context
+        :param client: server object
+        """
+        if client is None:
+            return
+        if self._pool is None:
+            client.close_connection()
+        else:
+            self._pool.checkin(client)
+            context.log.debug(f'Returned pooled connection to Postgres: {self._pool.stats()}')
+
+    def commit_run(self, context):
+        """
+        Commit the run transaction; solids commit their own changes, so there is nothing to commit
+        :param context: execution context
+        """
+        context.log.debug('No run transaction to commit, solids commit their own changes')
+
+    @property
+    def catalog_enabled(self):
+        """
+        Catalog snapshot enabled flag
+        """
+        return self._catalog_cfg is not None
+
+    def catalog_snapshot(self, context):
+        """
+        Get the snapshot of the table catalog, loading it if required
+        :param context: execution context
+        :return: tuple of (set of (schema name, table name) of the tables, list of the schemas of the search path), or
+                None if the snapshot is disabled or unable to connect
+        """
+        if not self.catalog_enabled:
+            return None
+        with self._catalog_lock:
+            ttl = self._catalog_cfg.get('ttl')
+            if self._catalog is not None and (ttl is None or monotonic() - self._catalog_time <= ttl):
+                return self._catalog, self._search_path
+
+            client = self.get_connection(context)
+            if client is None:
+                return None
+            cursor = client.cursor()
+            try:
+                cursor.execute(CATALOG_SQL)
+                catalog = set([(schema, table) for schema, table in cursor.fetchall()])
+                cursor.execute(SEARCH_PATH_SQL)
+                search_path = list(cursor.fetchone()[0])
+            finally:
+                cursor.close()
+                self.release_connection(context, client)
+
+            self._catalog = catalog
+            self._search_path = search_path
+            self._catalog_time = monotonic()
+            context.log.info(f'Loaded Postgres catalog snapshot: {len(catalog)} tables')
+            return catalog, search_path
+
+    def table_exists(self, context, name):
+        """
+        Check if a table exists using the catalog snapshot
+        :param context: execution context
+        :param name: table name, optionally schema qualified and/or quoted
+        :return: True if exists, or None if the snapshot is disabled or unavailable
+        """
+        snapshot = self.catalog_snapshot(context)
+        if snapshot is None:
+            return None
+        catalog, search_path = snapshot
+        return resolve_table(name, catalog, search_path) is not None
+
+    def invalidate_catalog(self):
+        """
+        Discard the catalog snapshot, so it is reloaded on next use
+        """
+        with self._catalog_lock:
+            self._catalog = None
+
 
 @resource(config_schema={
     'postgres_cfg': Field(Any),
-    'fatal': Field(Bool, default_value=True, is_required=False)
+    'fatal': Field(Bool, default_value=True, is_required=False),
+    'pool': Field(
+        {
+            'min_size': Field(Int, default_value=0, is_required=False,
+                              description='Number of idle connections kept open regardless of idle_timeout'),
+            'max_size': Field(Int, default_value=5, is_required=False,
+                              description='Maximum number of connections'),
+            'idle_timeout': Field(Float, default_value=300.0, is_required=False,
+                                  description='Seconds after which an idle connection is closed'),
+            'checkout_timeout': Field(Float, default_value=30.0, is_required=False,
+                                      description='Maximum seconds to wait for a free connection'),
+        },
+        is_required=False,
+        description='Enables a connection pool shared by all solids in the process',
+    ),
+    'catalog_snapshot': CATALOG_SNAPSHOT_FIELD,
 })
 def postgres_warehouse_resource(context):
     """
@@ -86,4 +257,233 @@ def postgres_warehouse_resource(context):
     :return:
     """
     return PostgresWarehouse(context.resource_config['postgres_cfg'],
-                             context.resource_config['fatal'])
+                             context.resource_config['fatal'],
+                             context.resource_config.get('pool'),
+                             context.resource_config.get('catalog_snapshot'))
+
+
+class RunScopedClient(object):
+    """
+    Proxy for the server object of a PostgresRunWarehouse, which defers commits until commit_run() is called
+    """
+    def __init__(self, client, savepoint=None, on_rollback=None):
+        """
+        Initialise object
+        :param client: server object
+        :param savepoint: name of the savepoint established for the solid using the proxy, or None
+        :param on_rollback: function called when the solid rolls back without a savepoint
+        """
+        self._client = client
+        self.savepoint = savepoint
+        self._connection = RunScopedConnection(client.get_connection(), savepoint, on_rollback)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def __getitem__(self, key):
+        return self._client[key]
+
+    def get_connection(self):
+        """
+        Get the connection
+        :return: proxy for the psycopg2 connection
+        """
+        return self._connection
+
+    def commit(self):
+        """
+        Commits are deferred until commit_run() is called
+        """
+        pass
+
+
+class RunScopedConnection(object):
+    """
+    Proxy for the psycopg2 connection of a PostgresRunWarehouse, which defers commits until commit_run() is called and
+    rolls back to the solid's savepoint
+    """
+    def __init__(self, connection, savepoint=None, on_rollback=None):
+        """
+        Initialise object
+        :param connection: psycopg2 connection
+        :param savepoint: name of the savepoint established for the solid using the proxy, or None
+        :param on_rollback: function called when the solid rolls back without a savepoint
+        """
+        self._connection = connection
+        self._savepoint = savepoint
+        self._on_rollback = on_rollback
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def commit(self):
+        """
+        Commits are deferred until commit_run() is called
+        """
+        pass
+
+    def rollback(self):
+        """
+        Roll back to the solid's savepoint.
+        Without a savepoint, rolling back would silently discard the changes made by earlier solids while later solids
+        continue, so instead the run transaction is marked to be rolled back when the resource is torn down, and may no
+        longer be committed. Whether the solid fails is left to its 'fatal' configuration, as with other resources.
+        """
+        if self._savepoint is None:
+            if self._on_rollback is not None:
+                self._on_rollback()
+            return
+        with self._connection.cursor() as cursor:
+            cursor.execute(f'ROLLBACK TO SAVEPOINT {self._savepoint}')
+
+
+class PostgresRunWarehouse(PostgresWarehouse):
+    """
+    Postgres data warehouse server object with a single connection for the duration of a run.
+    Solids share the run transaction, which is only committed by commit_run(), e.g. from the commit_run_transaction
+    solid once all other solids have succeeded, and is otherwise rolled back when the resource is torn down. Each solid
+    may optionally be isolated in a savepoint, so that an error only rolls back the changes made by that solid.
+
+    The run scope only holds under the in-process executor; other executors initialise a resource, and so a connection
+    and transaction, for each step. Solids which use the connection from multiple threads, e.g. multi_query_table(),
+    share it and interleave their savepoints, so the parallelism is limited to one connection.
+    """
+    def __init__(self, postgres_cfg, fatal=True, savepoints=False, catalog_cfg=None):
+        """
+        Initialise object and establish the run connection
+        :param postgres_cfg: path to server configuration file or configuration dict
+        :param fatal: Connection failure is fatal flag; default is True
+        :param savepoints: Establish a savepoint for each solid flag; default is False
+        :param catalog_cfg: catalog snapshot configuration dict with optional 'ttl', or None to disable the snapshot
+        """
+        super().__init__(postgres_cfg, fatal=fatal, catalog_cfg=catalog_cfg)
+        self._savepoints = savepoints
+        self._savepoint_ids = count()
+        self._active_savepoints = []
+        self._rollback_only = False
+        self._lock = threading.Lock()
+        self._run_client = self._open_client()
+        if self._run_client is None and fatal:
+            raise Failure(f'Unable to connect to Postgres: {self._server}')
+
+    def get_connection(self, context):
+        """
+        Get the run connection, establishing a savepoint if savepoints are enabled.
+        The connection should be returned by calling release_connection().
+        :param context: execution context
+        :return: proxy for the server object or None if unable to connect
+        :rtype: RunScopedClient
+        """
+        if self._run_client is None:
+            context.log.info(f'Unable to connect to Postgres: {self._server}')
+            return None
+
+        savepoint = None
+        if self._savepoints:
+            with self._lock:
+                savepoint = f'solid_{next(self._savepoint_ids)}'
+                with self._run_client.get_connection().cursor() as cursor:
+                    cursor.execute(f'SAVEPOINT {savepoint}')
+                self._active_savepoints.append(savepoint)
+            context.log.debug(f'Established savepoint {savepoint}')
+
+        return RunScopedClient(self._run_client, savepoint, on_rollback=self._set_rollback_only)
+
+    def _set_rollback_only(self):
+        """
+        Mark the run transaction to be rolled back rather than committed
+        """
+        self._rollback_only = True
+
+    @property
+    def max_connections(self):
+        """
+        Maximum number of connections which may be in use at once
+        :return: 1, as all solids share the run connection
+        """
+        return 1
+
+    def release_connection(self, context, client):
+        """
+        Release a connection obtained from get_connection(), releasing its savepoint, or rolling back to it if the
+        transaction is in error
+        :param context: execution context
+        :param client: proxy for the server object
+        """
+        if client is None or client.savepoint is None:
+            return
+        with self._lock:
+            if client.savepoint not in self._active_savepoints:
+                # already released along with an enclosing savepoint
+                return
+            # releasing a savepoint also releases the savepoints established after it
+            del self._active_savepoints[self._active_savepoints.index(client.savepoint):]
+
+            connection = self._run_client.get_connection()
+            with connection.cursor() as cursor:
+                if connection.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                    context.log.info(f'Rolling back to savepoint {client.savepoint}')
+                    cursor.execute(f'ROLLBACK TO SAVEPOINT {client.savepoint}')
+                cursor.execute(f'RELEASE SAVEPOINT {client.savepoint}')
+
+    def commit_run(self, context):
+        """
+        Commit the run transaction
+        :param context: execution context
+        """
+        if self._run_client is None:
+            return
+        with self._lock:
+            connection = self._run_client.get_connection()
+            if self._rollback_only:
+                raise Failure(f'Unable to commit run transaction on Postgres: {self._server}, a solid rolled back '
+                              f'without a savepoint; enable the savepoints option to roll back individual solids')
+            if connection.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                raise Failure(f'Unable to commit run transaction on Postgres: {self._server}, transaction is in error')
+            self._run_client.commit()
+            self._active_savepoints = []
+        context.log.info(f'Committed run transaction on Postgres: {self._server}')
+
+    def close(self, context):
+        """
+        Roll back any changes not committed by commit_run(), and close the run connection
+        :param context: execution context
+        """
+        if self._run_client is None:
+            return
+        connection = self._run_client.get_connection()
+        if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            context.log.info(f'Rolling back uncommitted run transaction on Postgres: {self._server}')
+        connection.rollback()
+        self._run_client.close_connection()
+        self._run_client = None
+        context.log.info(f'Closed run connection to Postgres: {self._server}')
+
+
+@resource(config_schema={
+    'postgres_cfg': Field(Any),
+    'fatal': Field(Bool, default_value=True, is_required=False),
+    'savepoints': Field(
+        Bool,
+        default_value=False,
+        is_required=False,
+        description='Establish a savepoint for each solid, so that an error only rolls back the changes made by '
+                    'that solid',
+    ),
+    'catalog_snapshot': CATALOG_SNAPSHOT_FIELD,
+})
+def postgres_run_warehouse_resource(context):
+    """
+    Resource constructor function for Postgres database, using a single connection and transaction for the run.
+    The transaction must be committed by the commit_run_transaction solid, otherwise it is rolled back at teardown.
+    :param context: execution context
+    :return:
+    """
+    warehouse = PostgresRunWarehouse(context.resource_config['postgres_cfg'],
+                                     context.resource_config['fatal'],
+                                     context.resource_config['savepoints'],
+                                     context.resource_config.get('catalog_snapshot'))
+    try:
+        yield warehouse
+    finally:
+        warehouse.close(context)
@@ -19,8 +19,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import psycopg2
-from dagster import solid, String, Bool, Field
-from db_toolkit.postgres import does_table_exist_sql
+from dagster import solid, String, Bool, Field, Output, OutputDefinition
+from .catalog import TABLE_EXISTS_SQL
+from ..utils import SolidMetrics
 
 
 @solid(required_resource_keys={'postgres_warehouse'},
@@ -31,7 +32,8 @@ from db_toolkit.postgres import does_table_exist_sql
                is_required=False,
                description='Controls whether exceptions cause a Failure or not',
            )
-       }
+       },
+       output_defs=[OutputDefinition(Bool)]
        )
 def does_psql_table_exist(context, name: String) -> Bool:
     """
@@ -42,7 +44,26 @@ def does_psql_table_exist(context, name: String) -> Bool:
     """
     exists = False
 
-    client = context.resources.postgres_warehouse.get_connection(context)
+    metrics = SolidMetrics()
+
+    # answer from the catalog snapshot if enabled, which is loaded once and shared by all checks
+    if context.resources.postgres_warehouse.catalog_enabled:
+        in_catalog = None
+        try:
+            with metrics.phase('catalog'):
+                in_catalog = context.resources.postgres_warehouse.table_exists(context, name)
+        except psycopg2.Error as e:
+            context.log.error(f'Catalog snapshot error: {e}')
+            if context.solid_config['fatal']:
+                raise e
+
+        if in_catalog is not None:
+            context.log.info(f'Table "{name}" {"exists" if in_catalog else "does not exist"} in catalog snapshot')
+            yield Output(in_catalog, metadata=metrics.metadata())
+            return
+
+    with metrics.phase('connect'):
+        client = context.resources.postgres_warehouse.get_connection(context)
 
     if client is not None:
 
@@ -51,9 +72,11 @@ def does_psql_table_exist(context, name: String) -> Bool:
         try:
             # execute the query and get all the results
             cursor = client.cursor()
-            cursor.execute(does_table_exist_sql(name))
-            # http://initd.org/psycopg/docs/cursor.html
-            exists = cursor.fetchone()
+            with metrics.phase('execute'):
+                cursor.execute(TABLE_EXISTS_SQL, (name,))
+                # http://initd.org/psycopg/docs/cursor.html
+                row = cursor.fetchone()
+            exists = row is not None and bool(row[0])
 
         except psycopg2.Error as e:
             context.log.error(f'Error: {e}')
@@ -63,9 +86,9 @@ def does_psql_table_exist(context, name: String) -> Bool:
         finally:
             # tidy up
             cursor.close()
-            client.close_connection()
+            context.resources.postgres_warehouse.release_connection(context, client)
 
-    return exists
+    yield Output(exists, metadata=metrics.metadata())
 
 
 @solid(required_resource_keys={'postgres_warehouse'},
@@ -92,8 +115,10 @@ def create_table(context, create_columns: String, table_name: String):
     :param create_columns: database table columns
     :param table_name: name of database table to upload to
     """
+    metrics = SolidMetrics()
 
-    client = context.resources.postgres_warehouse.get_connection(context)
+    with metrics.phase('connect'):
+        client = context.resources.postgres_warehouse.get_connection(context)
 
     if client is not None:
 
@@ -107,8 +132,9 @@ def create_table(context, create_columns: String, table_name: String):
                              f'({create_columns})'
         try:
             context.log.info(f"Execute create table query for '{table_name}'")
-            cursor.execute(create_table_query)
-            client.commit()
+            with metrics.phase('execute'):
+                cursor.execute(create_table_query)
+                client.commit()
 
         except psycopg2.Error as e:
             context.log.error(f'Error: {e}')
@@ -118,4 +144,7 @@ def create_table(context, create_columns: String, table_name: String):
         finally:
             # tidy up
             cursor.close()
-            client.close_connection()
+            context.resources.postgres_warehouse.invalidate_catalog()
+            context.resources.postgres_warehouse.release_connection(context, client)
+
+    yield Output(None, metadata=metrics.metadata())
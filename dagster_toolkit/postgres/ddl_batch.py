@@ -0,0 +1,129 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from time import perf_counter
+
+import psycopg2
+from dagster import solid, List, Bool, Field, Output, OutputDefinition
+from ..utils import SolidMetrics
+
+
+def ddl_statements(drop_tables, create_tables, cascade=False, reverse_drops=False, if_not_exists=True):
+    """
+    Generate the statements to drop and create tables
+    :param drop_tables: list of names of database tables to drop
+    :param create_tables: list of (table name, create columns) pairs of database tables to create
+    :param cascade: drop objects which depend on the tables flag; default is False
+    :param reverse_drops: drop tables in the reverse of the listed order flag; default is False
+    :param if_not_exists: include IF NOT EXISTS clause in create statements flag; default is True
+    :return: list of statements, drops before creates
+    """
+    if reverse_drops:
+        drop_tables = list(reversed(drop_tables))
+    cascade = ' CASCADE' if cascade else ''
+    exists = 'IF NOT EXISTS ' if if_not_exists else ''
+    return [f'DROP TABLE IF EXISTS {table_name}{cascade}' for table_name in drop_tables] + \
+        [f'CREATE TABLE {exists}{table_name} ({create_columns})' for table_name, create_columns in create_tables]
+
+
+@solid(required_resource_keys={'postgres_warehouse'},
+       config_schema={
+           'fatal': Field(
+               Bool,
+               default_value=True,
+               is_required=False,
+               description='Controls whether exceptions cause a Failure or not',
+           ),
+           'cascade': Field(
+               Bool,
+               default_value=False,
+               is_required=False,
+               description='Controls whether CASCADE clause is included in drop statements, so objects which '
+                           'depend on the tables are also dropped',
+           ),
+           'reverse_drops': Field(
+               Bool,
+               default_value=False,
+               is_required=False,
+               description='Drop tables in the reverse of the listed order, so tables listed in creation order '
+                           'are dropped before the tables they reference',
+           ),
+           'if_not_exists': Field(
+               Bool,
+               default_value=True,
+               is_required=False,
+               description='Controls whether IF NOT EXISTS clause is included in create statements',
+           )
+       },
+       output_defs=[OutputDefinition(List)]
+       )
+def ddl_batch(context, drop_tables: List, create_tables: List) -> List:
+    """
+    Drop and create tables on the Postgres server in a single transaction
+    :param context: execution context
+    :param drop_tables: list of names of database tables to drop
+    :param create_tables: list of (table name, create columns) pairs of database tables to create, in creation order
+    :return: list of dicts with the 'sql' and execution time in 'seconds' of each statement, or an empty list if
+            the transaction was rolled back
+    """
+    timings = []
+
+    metrics = SolidMetrics()
+
+    with metrics.phase('connect'):
+        client = context.resources.postgres_warehouse.get_connection(context)
+
+    if client is not None:
+
+        statements = ddl_statements(drop_tables, create_tables, cascade=context.solid_config['cascade'],
+                                    reverse_drops=context.solid_config['reverse_drops'],
+                                    if_not_exists=context.solid_config['if_not_exists'])
+
+        cursor = client.cursor()
+
+        try:
+            context.log.info(f'Execute {len(drop_tables)} drop and {len(create_tables)} create table queries')
+
+            with metrics.phase('execute') as phase:
+                for sql in statements:
+                    start = perf_counter()
+                    cursor.execute(sql)
+                    timings.append({'sql': sql, 'seconds': perf_counter() - start})
+                    context.log.debug(f"Executed '{sql}' in {timings[-1]['seconds']:.3f}s")
+            phase.add(rows=len(statements))
+
+            with metrics.phase('commit'):
+                client.commit()
+
+        except psycopg2.Error as e:
+            client.get_connection().rollback()
+            timings = []
+            context.log.error(f'Error: {e}')
+            if context.solid_config['fatal']:
+                raise e
+
+        finally:
+            # tidy up
+            cursor.close()
+            context.resources.postgres_warehouse.invalidate_catalog()
+            context.resources.postgres_warehouse.release_connection(context, client)
+
+    metrics.log(context)
+    yield Output(timings, metadata=metrics.metadata())
@@ -19,8 +19,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import psycopg2
-from dagster import solid, String, Bool, Field
+from dagster import solid, String, Bool, Field, Output, OutputDefinition
 from db_toolkit.postgres import drop_table_sql
+from ..utils import SolidMetrics
 
 
 @solid(required_resource_keys={'postgres_warehouse'},
@@ -31,7 +32,8 @@ from db_toolkit.postgres import drop_table_sql
                is_required=False,
                description='Controls whether exceptions cause a Failure or not',
            )
-       }
+       },
+       output_defs=[OutputDefinition(Bool)]
        )
 def drop_table(context, table_name: String) -> Bool:
     """
@@ -41,7 +43,10 @@ def drop_table(context, table_name: String) -> Bool:
     """
     dropped = False
 
-    client = context.resources.postgres_warehouse.get_connection(context)
+    metrics = SolidMetrics()
+
+    with metrics.phase('connect'):
+        client = context.resources.postgres_warehouse.get_connection(context)
 
     if client is not None:
 
@@ -49,8 +54,9 @@ def drop_table(context, table_name: String) -> Bool:
 
         try:
             context.log.info(f'Execute drop table query for {table_name}')
-            cursor.execute(drop_table_sql(table_name))
-            client.commit()
+            with metrics.phase('execute'):
+                cursor.execute(drop_table_sql(table_name))
+                client.commit()
             dropped = True
 
         except psycopg2.Error as e:
@@ -61,6 +67,7 @@ def drop_table(context, table_name: String) -> Bool:
         finally:
             # tidy up
             cursor.close()
-            client.close_connection()
+            context.resources.postgres_warehouse.invalidate_catalog()
+            context.resources.postgres_warehouse.release_connection(context, client)
 
-    return dropped
+    yield Output(dropped, metadata=metrics.metadata())
@@ -0,0 +1,177 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pandas as pd
+from ..utils import categorize
+
+# Postgres type OIDs, see https://github.com/postgres/postgres/blob/master/src/include/catalog/pg_type.dat
+BOOL_OID = 16
+INT8_OID = 20
+INT2_OID = 21
+INT4_OID = 23
+FLOAT4_OID = 700
+FLOAT8_OID = 701
+NUMERIC_OID = 1700
+DATE_OID = 1082
+TIMESTAMP_OID = 1114
+TIMESTAMPTZ_OID = 1184
+CHAR_OID = 18
+NAME_OID = 19
+TEXT_OID = 25
+BPCHAR_OID = 1042
+VARCHAR_OID = 1043
+
+# pandas dtypes for the columns of a COPY ... TO STDOUT csv result
+COPY_DTYPES = {
+    BOOL_OID: 'boolean',
+    INT8_OID: 'Int64',
+    INT2_OID: 'Int16',
+    INT4_OID: 'Int32',
+    FLOAT4_OID: 'float32',
+    FLOAT8_OID: 'float64',
+    NUMERIC_OID: 'float64',
+}
+
+DATETIME_OIDS = [
+    DATE_OID,
+    TIMESTAMP_OID,
+    TIMESTAMPTZ_OID,
+]
+
+# string representing NULL in COPY csv data, which is unlikely to be a genuine value; unlike the default for csv
+# format, an empty string, it allows empty strings to be distinguished from NULL
+COPY_NULL = '__null_7f3c9e1d__'
+
+
+def copy_read_csv_args(description):
+    """
+    Get the pandas.read_csv() arguments required to load a COPY ... TO STDOUT csv result with the correct column
+    names and types. Only COPY_NULL is treated as a missing value, so text such as 'NA', 'null' or '' is loaded
+    unchanged, as fetchall() would.
+    :param description: cursor description of the query
+    :return: dict of arguments for pandas.read_csv()
+    """
+    names = [column[0] for column in description]
+    dtype = {}
+    parse_dates = []
+    for column in description:
+        name, type_code = column[0], column[1]
+        if type_code == TIMESTAMPTZ_OID:
+            # converted by convert_copy_columns()
+            dtype[name] = object
+        elif type_code in DATETIME_OIDS:
+            parse_dates.append(name)
+        else:
+            # anything unknown is loaded as str, as fetchall() would for text types
+            dtype[name] = COPY_DTYPES.get(type_code, object)
+    return {
+        'names': names,
+        'header': None,
+        'dtype': dtype,
+        'parse_dates': parse_dates,
+        'true_values': ['t'],
+        'false_values': ['f'],
+        'keep_default_na': False,
+        'na_values': [COPY_NULL],
+    }
+
+
+def convert_copy_columns(df, description, categorical_max_ratio=None):
+    """
+    Convert the columns of a DataFrame loaded from a COPY ... TO STDOUT csv result using copy_read_csv_args(), which
+    pandas.read_csv() can't convert itself, to the dtypes of a fetched result built by build_dataframe().
+    TIMESTAMPTZ values are output in the session timezone, so their offsets may differ, e.g. either side of a daylight
+    saving time change, and are converted to UTC.
+    :param df: panda DataFrame
+    :param description: cursor description of the query
+    :param categorical_max_ratio: maximum ratio of unique values to values for a text column to be converted to a
+                                category; None to never convert
+    :return: converted panda DataFrame
+    """
+    for column in description:
+        name, type_code = column[0], column[1]
+        if type_code == TIMESTAMPTZ_OID:
+            df[name] = pd.to_datetime(df[name], utc=True)
+        elif type_code in TEXT_OIDS and categorical_max_ratio is not None:
+            df[name] = categorize(df[name], categorical_max_ratio)
+    return df
+
+
+# pandas dtypes for the columns of a fetched result; NUMERIC is left as Decimal to preserve precision
+RECORD_DTYPES = {
+    BOOL_OID: 'boolean',
+    INT8_OID: 'Int64',
+    INT2_OID: 'Int16',
+    INT4_OID: 'Int32',
+    FLOAT4_OID: 'float32',
+    FLOAT8_OID: 'float64',
+}
+
+TEXT_OIDS = [
+    CHAR_OID,
+    NAME_OID,
+    TEXT_OID,
+    BPCHAR_OID,
+    VARCHAR_OID,
+]
+
+
+def convert_column(values, type_code, categorical_max_ratio=None):
+    """
+    Convert a column of fetched values to the pandas dtype corresponding to its Postgres type.
+    Nullable integer columns are built directly from the fetched values, so values beyond the precision of float64
+    are not lost to an intermediate float conversion.
+    :param values: sequence of fetched values
+    :param type_code: Postgres type OID
+    :param categorical_max_ratio: maximum ratio of unique values to values for a text column to be converted to a
+                                category; None to never convert
+    :return: converted panda Series
+    """
+    if type_code in RECORD_DTYPES:
+        series = pd.Series(pd.array(list(values), dtype=RECORD_DTYPES[type_code]))
+    elif type_code in DATETIME_OIDS:
+        series = pd.Series(pd.to_datetime(list(values), utc=(type_code == TIMESTAMPTZ_OID)))
+    else:
+        series = pd.Series(list(values), dtype=object)
+        if type_code in TEXT_OIDS and categorical_max_ratio is not None:
+            series = categorize(series, categorical_max_ratio)
+    return series
+
+
+def build_dataframe(results, description, categorical_max_ratio=None):
+    """
+    Build a DataFrame from fetched records, with column names and dtypes from the cursor description
+    :param results: list of record tuples
+    :param description: cursor description of the query
+    :param categorical_max_ratio: maximum ratio of unique values to values for a text column to be converted to a
+                                category; None to never convert
+    :return: panda DataFrame
+    :rtype: panda.DataFrame
+    """
+    names = [column[0] for column in description]
+    columns = list(zip(*results)) if len(results) > 0 else [()] * len(names)
+    # convert by position, as column names in a result are not necessarily unique
+    df = pd.DataFrame({
+        index: convert_column(columns[index], column[1], categorical_max_ratio=categorical_max_ratio)
+        for index, column in enumerate(description)
+    })
+    df.columns = names
+    return df
@@ -0,0 +1,199 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from io import StringIO
+from uuid import uuid4
+
+import psycopg2
+import pandas as pd
+from pandas.api.types import is_float_dtype
+from dagster import solid, String, Bool, Int, Field, Enum, EnumValue, Noneable, Output, OutputDefinition, Failure
+from dagster_pandas import DataFrame
+from .dtypes import COPY_NULL
+from ..utils import SolidMetrics, memory_usage
+
+
+def quote_identifier(name):
+    """
+    Quote an identifier for use in an SQL statement
+    :param name: identifier
+    :return: quoted identifier
+    """
+    name = str(name).replace('"', '""')
+    return f'"{name}"'
+
+
+def integral_floats_to_int(df):
+    """
+    Convert float columns whose values are all whole numbers, e.g. integer columns with missing values, to nullable
+    integers, so they are written as '1' rather than '1.0', which COPY rejects for integer columns
+    :param df: panda DataFrame
+    :return: converted panda DataFrame, or the original if no columns were converted
+    """
+    converted = {}
+    for index in range(len(df.columns)):
+        values = df.iloc[:, index]
+        if is_float_dtype(values.dtype):
+            present = values.dropna()
+            if ((present % 1) == 0).all() and (present.abs() < 2 ** 63).all():
+                converted[index] = values.astype('Int64')
+    if len(converted) > 0:
+        # by position, as column names are not necessarily unique
+        df = pd.concat([converted.get(index, df.iloc[:, index]) for index in range(len(df.columns))], axis=1)
+    return df
+
+
+def copy_dataframe(cursor, df, table_name, chunk_size):
+    """
+    Copy a DataFrame into a table using COPY ... FROM STDIN
+    :param cursor: cursor to use
+    :param df: panda DataFrame to copy
+    :param table_name: name of database table to copy to
+    :param chunk_size: maximum number of records to buffer at once
+    :return: number of records copied
+    """
+    columns = ', '.join([quote_identifier(column) for column in df.columns])
+    copy_sql = f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+
+    count = 0
+    for start in range(0, len(df), chunk_size):
+        chunk = integral_floats_to_int(df.iloc[start:start + chunk_size])
+        # missing values are written as COPY_NULL, so empty strings are not loaded as NULL
+        buffer = StringIO()
+        chunk.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+        buffer.seek(0)
+        # http://initd.org/psycopg/docs/cursor.html#cursor.copy_expert
+        cursor.copy_expert(copy_sql, buffer)
+        count += len(chunk)
+    return count
+
+
+@solid(required_resource_keys={'postgres_warehouse'},
+       config_schema={
+           'fatal': Field(
+               Bool,
+               default_value=True,
+               is_required=False,
+               description='Controls whether exceptions cause a Failure or not',
+           ),
+           'mode': Field(
+               Enum('LoadMode', [
+                   EnumValue('append', description='Add the records to the table'),
+                   EnumValue('truncate', description='Empty the table before adding the records'),
+                   EnumValue('upsert', description='Insert new records and update existing records, '
+                                                   'matching on key_columns'),
+               ]),
+               default_value='append',
+               is_required=False,
+               description='Load mode',
+           ),
+           'key_columns': Field(
+               Noneable([String]),
+               default_value=None,
+               is_required=False,
+               description='Columns of a unique index or primary key identifying existing records in upsert mode',
+           ),
+           'chunk_size': Field(
+               Int,
+               default_value=10000,
+               is_required=False,
+               description='Maximum number of records buffered for each COPY',
+           )
+       },
+       output_defs=[OutputDefinition(Int)]
+       )
+def load_dataframe(context, df: DataFrame, table_name: String) -> Int:
+    """
+    Load a DataFrame into a table on the Postgres server using COPY ... FROM STDIN, in a single transaction
+    :param context: execution context
+    :param df: panda DataFrame to load; column names must match the table column names
+    :param table_name: name of database table to load to
+    :return: number of records loaded
+    """
+    loaded = 0
+
+    mode = context.solid_config['mode']
+    key_columns = context.solid_config['key_columns']
+    if mode == 'upsert' and not key_columns:
+        raise Failure('key_columns must be specified for upsert mode')
+
+    metrics = SolidMetrics()
+
+    with metrics.phase('connect'):
+        client = context.resources.postgres_warehouse.get_connection(context)
+
+    if client is not None:
+
+        chunk_size = context.solid_config['chunk_size']
+
+        cursor = client.cursor()
+
+        try:
+            if mode == 'truncate':
+                context.log.info(f'Execute truncate table query for {table_name}')
+                with metrics.phase('truncate'):
+                    cursor.execute(f'TRUNCATE TABLE {table_name}')
+
+            context.log.info(f"Load {len(df)} records into '{table_name}' ({mode})")
+
+            if mode == 'upsert':
+                # copy into a staging table, then merge into the target table
+                staging = f'staging_{uuid4().hex}'
+                cursor.execute(f'CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) '
+                               f'ON COMMIT DROP')
+                with metrics.phase('copy') as phase:
+                    phase.add(rows=copy_dataframe(cursor, df, staging, chunk_size))
+
+                columns = ', '.join([quote_identifier(column) for column in df.columns])
+                keys = ', '.join([quote_identifier(column) for column in key_columns])
+                updates = ', '.join([f'{quote_identifier(column)} = EXCLUDED.{quote_identifier(column)}'
+                                     for column in df.columns if column not in key_columns])
+                action = f'UPDATE SET {updates}' if len(updates) > 0 else 'NOTHING'
+                with metrics.phase('merge') as phase:
+                    cursor.execute(f'INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging} '
+                                   f'ON CONFLICT ({keys}) DO {action}')
+                loaded = cursor.rowcount
+                phase.add(rows=loaded)
+            else:
+                with metrics.phase('copy') as phase:
+                    loaded = copy_dataframe(cursor, df, table_name, chunk_size)
+                phase.add(rows=loaded)
+
+            with metrics.phase('commit'):
+                client.commit()
+
+            context.log.info(f"Loaded {loaded} records into '{table_name}'")
+
+        except psycopg2.Error as e:
+            client.get_connection().rollback()
+            loaded = 0
+            context.log.error(f'Error: {e}')
+            if context.solid_config['fatal']:
+                raise e
+
+        finally:
+            # tidy up
+            cursor.close()
+            context.resources.postgres_warehouse.release_connection(context, client)
+
+    metadata = metrics.metadata()
+    metadata['dataframe_memory'] = memory_usage(df)
+    yield Output(loaded, metadata=metadata)
@@ -0,0 +1,227 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import atexit
+import json
+import threading
+from collections import deque
+from time import monotonic
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when a connection could not be checked out of a pool in time
+    """
+    pass
+
+
+class PostgresPool(object):
+    """
+    Pool of Postgres server connections which may be shared by the solids running in a process
+    """
+    def __init__(self, factory, min_size=0, max_size=5, idle_timeout=300.0, checkout_timeout=30.0):
+        """
+        Initialise object
+        :param factory: function returning a new connected PostgresDb, or None if unable to connect
+        :param min_size: number of idle connections which are never closed due to idle timeout
+        :param max_size: maximum number of connections, idle and checked out
+        :param idle_timeout: seconds after which an idle connection above min_size is closed
+        :param checkout_timeout: maximum seconds to wait for a connection to become available
+        """
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f'Invalid pool size: min {min_size}, max {max_size}')
+        self._factory = factory
+        self._min_size = min_size
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._checkout_timeout = checkout_timeout
+        self._idle = deque()    # (client, time returned) with most recently returned on the right
+        self._size = 0          # number of connections, idle and checked out
+        self._cond = threading.Condition()
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def max_size(self):
+        """
+        Maximum number of connections, idle and checked out
+        """
+        return self._max_size
+
+    def checkout(self):
+        """
+        Check out a connection from the pool, waiting until one is available if necessary
+        :return: tuple of (server object or None if unable to connect, seconds waited)
+        :rtype: (PostgresDb, float)
+        """
+        start = monotonic()
+        client = None
+        with self._cond:
+            while True:
+                self._close_expired()
+                if len(self._idle) > 0:
+                    client, _ = self._idle.pop()
+                    if PostgresPool._is_usable(client):
+                        break
+                    self._discard(client)
+                    client = None
+                    continue
+                if self._size < self._max_size:
+                    # reserve a slot, the connection is made outside the lock
+                    self._size += 1
+                    break
+                remaining = self._checkout_timeout - (monotonic() - start)
+                if remaining <= 0:
+                    raise PoolTimeout(f'No connection available after {self._checkout_timeout}s '
+                                      f'(max_size {self._max_size})')
+                self._cond.wait(remaining)
+
+        if client is None:
+            try:
+                client = self._factory()
+            finally:
+                if client is None:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+
+        wait = monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+        return client, wait
+
+    def checkin(self, client):
+        """
+        Return a connection to the pool
+        :param client: server object previously checked out
+        """
+        if client is None:
+            return
+        usable = PostgresPool._reset(client)
+        with self._cond:
+            if usable:
+                self._idle.append((client, monotonic()))
+            else:
+                self._discard(client)
+            self._cond.notify()
+
+    def close(self):
+        """
+        Close all idle connections; checked out connections are closed when returned
+        """
+        with self._cond:
+            while len(self._idle) > 0:
+                client, _ = self._idle.popleft()
+                self._discard(client)
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Get pool usage statistics
+        :return: dict of statistics
+        """
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'total_wait': self._total_wait,
+                'max_wait': self._max_wait,
+            }
+
+    def _close_expired(self):
+        """
+        Close connections which have been idle for longer than the idle timeout, oldest first.
+        Must be called with the lock held.
+        """
+        now = monotonic()
+        while len(self._idle) > self._min_size:
+            client, returned = self._idle[0]
+            if now - returned < self._idle_timeout:
+                break
+            self._idle.popleft()
+            self._discard(client)
+
+    def _discard(self, client):
+        """
+        Close a connection and remove it from the pool. Must be called with the lock held.
+        """
+        self._size -= 1
+        try:
+            client.close_connection()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_usable(client):
+        connection = client.get_connection()
+        return connection is not None and not connection.closed
+
+    @staticmethod
+    def _reset(client):
+        """
+        Discard any uncommitted transaction so the connection is clean for the next user
+        :return: True if the connection may be reused
+        """
+        try:
+            connection = client.get_connection()
+            if connection is None or connection.closed:
+                return False
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return True
+        except Exception:
+            return False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(postgres_cfg, factory, **kwargs):
+    """
+    Get the process-wide pool for a server configuration, creating it if necessary
+    :param postgres_cfg: path to server configuration file or configuration dict
+    :param factory: function returning a new connected PostgresDb
+    :param kwargs: pool arguments as specified by PostgresPool()
+    :return: pool
+    :rtype: PostgresPool
+    """
+    key = json.dumps([postgres_cfg, kwargs], sort_keys=True, default=str)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = PostgresPool(factory, **kwargs)
+            _pools[key] = pool
+    return pool
+
+
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
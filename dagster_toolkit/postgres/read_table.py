@@ -18,11 +18,45 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from time import perf_counter
+from uuid import uuid4
+
 import psycopg2
-from dagster import solid, Field, Bool, List
+from dagster import (
+    solid,
+    Field,
+    Bool,
+    List,
+    Int,
+    Float,
+    Dict,
+    Noneable,
+    Enum,
+    EnumValue,
+    DynamicOutput,
+    DynamicOutputDefinition,
+    OutputDefinition,
+    Failure,
+    Output,
+    ExpectationResult
+)
 import pandas as pd
 from dagster import String, Optional
 from dagster_pandas import DataFrame
+from .dtypes import copy_read_csv_args, convert_copy_columns, build_dataframe, COPY_NULL
+from ..utils import DataFrameCache, SolidMetrics, approximate_size
+
+# solid configuration options which affect the resulting DataFrame, and so are included in the query cache key
+RESULT_OPTIONS = ['copy', 'categorical_max_ratio']
+
+# table names following FROM or JOIN, optionally schema qualified and/or quoted
+TABLE_NAME_REGEX = re.compile(r'\b(?:from|join)\s+((?:"[^"]+"|\w+)(?:\.(?:"[^"]+"|\w+))?)', re.IGNORECASE)
 
 
 @solid(required_resource_keys={'postgres_warehouse'},
@@ -32,8 +66,39 @@ from dagster_pandas import DataFrame
                default_value=True,
                is_required=False,
                description='Controls whether exceptions cause a Failure or not',
+           ),
+           'categorical_max_ratio': Field(
+               Noneable(Float),
+               default_value=None,
+               is_required=False,
+               description='Convert text columns with a ratio of unique values to records no greater than this '
+                           'to categories',
+           ),
+           'copy': Field(
+               Bool,
+               default_value=False,
+               is_required=False,
+               description='Retrieve the results using COPY ... TO STDOUT rather than fetching records',
+           ),
+           'cache': Field(
+               {
+                   'cache_dir': Field(String, description='Path to cache directory'),
+                   'ttl': Field(Float, default_value=3600.0, is_required=False,
+                                description='Maximum age in seconds of a cached result'),
+                   'max_size': Field(Int, default_value=1024 ** 3, is_required=False,
+                                     description='Maximum total size in bytes of cached results'),
+                   'format': Field(
+                       Enum('QueryCacheFormat', [EnumValue('parquet'), EnumValue('feather')]),
+                       default_value='parquet',
+                       is_required=False,
+                       description='Cache file format',
+                   ),
+               },
+               is_required=False,
+               description='Enables caching of query results',
            )
-       }
+       },
+       output_defs=[OutputDefinition(Optional[DataFrame])]
        )
 def query_table(context, sql: String) -> Optional[DataFrame]:
     """
@@ -43,14 +108,103 @@ def query_table(context, sql: String) -> Optional[DataFrame]:
     :return: panda DataFrame or None
     :rtype: panda.DataFrame
     """
-    return __run_query_table(context, None, sql)
+    metrics = SolidMetrics()
+
+    cache_cfg = context.solid_config.get('cache')
+    if cache_cfg is None:
+        df = __run_query_table(context, None, sql, metrics)
+        metrics.log(context)
+        yield Output(df, metadata=metrics.metadata())
+        return
+
+    cache = DataFrameCache(cache_cfg['cache_dir'], max_size=cache_cfg['max_size'], file_format=cache_cfg['format'])
+    key = query_cache_key(sql, context.resources.postgres_warehouse.identity, {
+        option: context.solid_config[option] for option in RESULT_OPTIONS
+    })
+
+    with metrics.phase('cache') as phase:
+        df, meta = cache.get(key, ttl=cache_cfg['ttl'])
+    if df is not None:
+        phase.add(df=df)
+        context.log.info(f'Query cache hit: {key}, saved {meta["elapsed"]:.3f}s')
+        metrics.log(context)
+        yield Output(df, metadata=dict(metrics.metadata(), **{
+            'cache': 'hit',
+            'cache_key': key,
+            'saved_seconds': meta['elapsed'],
+        }))
+    else:
+        context.log.info(f'Query cache miss: {key}')
+        start = perf_counter()
+        df = __run_query_table(context, None, sql, metrics)
+        elapsed = perf_counter() - start
+        if df is not None:
+            try:
+                cache.put(key, df, tags=query_table_names(sql), elapsed=elapsed, sql=sql)
+            except Exception as e:
+                # caching is best-effort, the query has succeeded
+                context.log.warning(f'Unable to cache query result: {e}')
+        metrics.log(context)
+        yield Output(df, metadata=dict(metrics.metadata(), **{
+            'cache': 'miss',
+            'cache_key': key,
+            'query_seconds': elapsed,
+        }))
+
+
+def query_cache_key(sql: String, identity: String, options: Dict) -> String:
+    """
+    Generate the query cache key for an SQL
+    :param sql: the SQL select query
+    :param identity: server configuration identity
+    :param options: dictionary of the solid configuration options affecting the resulting DataFrame
+    :return: key
+    """
+    normalised = ' '.join(sql.split()).rstrip(';').strip()
+    fingerprint = json.dumps([identity, options, normalised], sort_keys=True, default=str)
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
 
 
-def __run_query_table(context, client, sql: String) -> Optional[DataFrame]:
+def query_table_names(sql: String) -> List:
+    """
+    Get the names of the tables used in an SQL, for cache invalidation
+    :param sql: the SQL select query
+    :return: list of lowercase table names; schema qualified names are included with and without the schema
+    """
+    names = set()
+    for match in TABLE_NAME_REGEX.findall(sql):
+        name = match.replace('"', '').lower()
+        names.add(name)
+        names.add(name.split('.')[-1])
+    return sorted(names)
+
+
+@solid(config_schema={
+           'cache_dir': Field(String, description='Path to query cache directory'),
+       }
+       )
+def invalidate_query_cache(context, table_name: String) -> Int:
+    """
+    Remove all cached query results which use the specified table
+    :param context: execution context
+    :param table_name: name of database table
+    :return: number of cached results removed
+    """
+    cache = DataFrameCache(context.solid_config['cache_dir'])
+    removed = cache.invalidate(table_name.replace('"', '').lower())
+
+    context.log.info(f"Removed {len(removed)} cached results for '{table_name}'")
+
+    return len(removed)
+
+
+def __run_query_table(context, client, sql: String, metrics: SolidMetrics) -> Optional[DataFrame]:
     """
     Execute an SQL
     :param context: execution context
+    :param client: server object to use, or None to get a connection from the resource
     :param sql: the SQL select query to execute
+    :param metrics: metrics to record the connect, execute, fetch and build phases in
     :return: panda DataFrame or None
     :rtype: panda.DataFrame
     """
@@ -58,7 +212,8 @@ def __run_query_table(context, client, sql: String) -> Optional[DataFrame]:
 
     close_down = client is None
     if close_down:
-        client = context.resources.postgres_warehouse.get_connection(context)
+        with metrics.phase('connect'):
+            client = context.resources.postgres_warehouse.get_connection(context)
 
     if client is not None:
 
@@ -68,20 +223,31 @@ def __run_query_table(context, client, sql: String) -> Optional[DataFrame]:
         cursor = client.cursor()
 
         try:
-            cursor.execute(sql)
-            # http://initd.org/psycopg/docs/cursor.html
-            results = cursor.fetchall()
+            if context.solid_config['copy']:
+                df = __copy_query_table(context, cursor, sql, metrics)
+            else:
+                with metrics.phase('execute'):
+                    cursor.execute(sql)
+                # http://initd.org/psycopg/docs/cursor.html
+                with metrics.phase('fetch') as phase:
+                    results = cursor.fetchall()
+                phase.add(rows=len(results), nbytes=approximate_size(results))
 
-            context.log.info(f'{len(results)} records retrieved')
+                context.log.info(f'{len(results)} records retrieved')
 
-            context.log.info(f'DataFrame loading in progress')
+                context.log.info(f'DataFrame loading in progress')
 
-            # load the results into a DataFrame
-            df = pd.DataFrame.from_records(results)
+                # load the results into a DataFrame
+                with metrics.phase('build') as phase:
+                    df = build_dataframe(results, cursor.description,
+                                         categorical_max_ratio=context.solid_config['categorical_max_ratio'])
+                phase.add(df=df)
 
             context.log.info(f'Loaded {len(df)} records')
 
         except psycopg2.Error as e:
+            # end the failed transaction, so the connection may be reused for subsequent queries
+            client.get_connection().rollback()
             context.log.error(f'Error: {e}')
             if context.solid_config['fatal']:
                 raise e
@@ -90,11 +256,46 @@ def __run_query_table(context, client, sql: String) -> Optional[DataFrame]:
             # tidy up
             cursor.close()
             if close_down:
-                client.close_connection()
+                context.resources.postgres_warehouse.release_connection(context, client)
 
     return df
 
 
+def __copy_query_table(context, cursor, sql: String, metrics: SolidMetrics) -> DataFrame:
+    """
+    Execute an SQL using COPY ... TO STDOUT and parse the csv output with the pandas C parser
+    :param context: execution context
+    :param cursor: cursor to use
+    :param sql: the SQL select query to execute
+    :param metrics: metrics to record the execute, fetch and build phases in
+    :return: panda DataFrame
+    :rtype: panda.DataFrame
+    """
+    sql = sql.strip().rstrip(';')
+
+    # get the column names and types without retrieving any records
+    with metrics.phase('execute'):
+        cursor.execute(f'SELECT * FROM ({sql}) AS copy_query LIMIT 0')
+    description = cursor.description
+    read_csv_args = copy_read_csv_args(description)
+
+    # http://initd.org/psycopg/docs/cursor.html#cursor.copy_expert
+    buffer = StringIO()
+    with metrics.phase('fetch') as phase:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+    phase.add(nbytes=buffer.tell())
+    context.log.info(f'{buffer.tell()} characters retrieved')
+    buffer.seek(0)
+
+    context.log.info(f'DataFrame loading in progress')
+
+    with metrics.phase('build') as phase:
+        df = convert_copy_columns(pd.read_csv(buffer, **read_csv_args), description,
+                                  categorical_max_ratio=context.solid_config['categorical_max_ratio'])
+    phase.add(df=df)
+    return df
+
+
 @solid(required_resource_keys={'postgres_warehouse'},
        config_schema={
            'fatal': Field(
@@ -102,8 +303,29 @@ def __run_query_table(context, client, sql: String) -> Optional[DataFrame]:
                default_value=True,
                is_required=False,
                description='Controls whether exceptions cause a Failure or not',
+           ),
+           'categorical_max_ratio': Field(
+               Noneable(Float),
+               default_value=None,
+               is_required=False,
+               description='Convert text columns with a ratio of unique values to records no greater than this '
+                           'to categories',
+           ),
+           'copy': Field(
+               Bool,
+               default_value=False,
+               is_required=False,
+               description='Retrieve the results using COPY ... TO STDOUT rather than fetching records',
+           ),
+           'max_parallelism': Field(
+               Int,
+               default_value=1,
+               is_required=False,
+               description='Maximum number of queries to execute concurrently, each on its own connection; '
+                           'limited to the maximum number of connections of the resource',
            )
-       }
+       },
+       output_defs=[OutputDefinition(List[Optional[DataFrame]])]
        )
 def multi_query_table(context, sql_list: List) -> List[Optional[DataFrame]]:
     """
@@ -113,13 +335,174 @@ def multi_query_table(context, sql_list: List) -> List[Optional[DataFrame]]:
     :return: panda DataFrame or None
     :rtype: panda.DataFrame
     """
-    dfs = []
+    metrics = SolidMetrics()
+
+    max_parallelism = context.solid_config['max_parallelism']
+    max_connections = context.resources.postgres_warehouse.max_connections
+    if max_connections is not None and max_parallelism > max_connections:
+        # more workers than connections would just wait for a connection to be checked in, and may time out
+        context.log.info(f'Limiting max parallelism {max_parallelism} to {max_connections} connections')
+        max_parallelism = max_connections
+    if max_parallelism > 1 and len(sql_list) > 1:
+        dfs = __parallel_query_table(context, sql_list, max_parallelism, metrics)
+    else:
+        dfs = []
+
+        with metrics.phase('connect'):
+            client = context.resources.postgres_warehouse.get_connection(context)
+
+        for sql in sql_list:
+            dfs.append(__run_query_table(context, client, sql, metrics))
+
+        context.resources.postgres_warehouse.release_connection(context, client)
 
-    client = context.resources.postgres_warehouse.get_connection(context)
+    metrics.log(context)
+    yield Output(dfs, metadata=metrics.metadata())
 
-    for sql in sql_list:
-        dfs.append(__run_query_table(context, client, sql))
 
-    client.close_connection()
+def __parallel_query_table(context, sql_list: List, max_parallelism: Int,
+                           metrics: SolidMetrics) -> List[Optional[DataFrame]]:
+    """
+    Execute a list of SQL concurrently on a thread pool, with a connection per worker thread
+    :param context: execution context
+    :param sql_list: list of SQL select queries to execute
+    :param max_parallelism: maximum number of worker threads
+    :param metrics: metrics to record the phases in; phase times are totalled across worker threads
+    :return: list of panda DataFrame or None, in the same order as sql_list
+    :rtype: list
+    """
+    warehouse = context.resources.postgres_warehouse
+    workers = threading.local()
+    clients = []
+    clients_lock = threading.Lock()
+
+    def run_query(index, sql):
+        start = perf_counter()
+        if not hasattr(workers, 'client'):
+            with metrics.phase('connect'):
+                workers.client = warehouse.get_connection(context)
+            with clients_lock:
+                clients.append(workers.client)
+        if workers.client is None:
+            df = None
+        else:
+            df = __run_query_table(context, workers.client, sql, metrics)
+        elapsed = perf_counter() - start
+        context.log.info(f'Query {index} completed in {elapsed:.3f}s')
+        return df
+
+    context.log.info(f'Execute {len(sql_list)} queries with max parallelism {max_parallelism}')
+
+    with ThreadPoolExecutor(max_workers=min(max_parallelism, len(sql_list))) as executor:
+        futures = [executor.submit(run_query, index, sql) for index, sql in enumerate(sql_list)]
+
+    for client in clients:
+        warehouse.release_connection(context, client)
+
+    # wait for all queries before failing, so one failure doesn't hide the others
+    dfs = []
+    errors = []
+    for index, future in enumerate(futures):
+        error = future.exception()
+        if error is None:
+            dfs.append(future.result())
+        else:
+            context.log.error(f'Query {index} error: {error}')
+            errors.append(f'{index}: {error}')
+            dfs.append(None)
+
+    if len(errors) > 0 and context.solid_config['fatal']:
+        raise Failure(f'{len(errors)} of {len(sql_list)} queries failed: ' + '; '.join(errors))
 
     return dfs
+
+
+@solid(required_resource_keys={'postgres_warehouse'},
+       config_schema={
+           'fatal': Field(
+               Bool,
+               default_value=True,
+               is_required=False,
+               description='Controls whether exceptions cause a Failure or not',
+           ),
+           'categorical_max_ratio': Field(
+               Noneable(Float),
+               default_value=None,
+               is_required=False,
+               description='Convert text columns with a ratio of unique values to records no greater than this '
+                           'to categories; applied to each chunk separately, so a column may be a category in some '
+                           'chunks and not in others',
+           ),
+           'chunk_size': Field(
+               Int,
+               default_value=10000,
+               is_required=False,
+               description='Number of records per DataFrame chunk',
+           )
+       },
+       output_defs=[DynamicOutputDefinition(DataFrame)]
+       )
+def stream_query_table(context, sql: String):
+    """
+    Execute an SQL using a server-side cursor, so that memory usage is bounded by the chunk size rather than the
+    size of the result set
+    :param context: execution context
+    :param sql: the SQL select query to execute
+    :return: dynamic output of panda DataFrame chunks
+    :rtype: panda.DataFrame
+    """
+    metrics = SolidMetrics()
+
+    with metrics.phase('connect'):
+        client = context.resources.postgres_warehouse.get_connection(context)
+
+    if client is not None:
+
+        chunk_size = context.solid_config['chunk_size']
+
+        context.log.info(f"Execute streaming query: '{sql}'")
+
+        # a named cursor is a server-side cursor, records are only transferred when fetched
+        # http://initd.org/psycopg/docs/usage.html#server-side-cursors
+        cursor = client.get_connection().cursor(name=f'stream_{uuid4().hex}')
+        cursor.itersize = chunk_size
+
+        try:
+            with metrics.phase('execute'):
+                cursor.execute(sql)
+
+            count = 0
+            chunk = 0
+            while True:
+                with metrics.phase('fetch') as phase:
+                    results = cursor.fetchmany(chunk_size)
+                if len(results) == 0:
+                    break
+                phase.add(rows=len(results), nbytes=approximate_size(results))
+
+                # load the results into a DataFrame
+                with metrics.phase('build') as phase:
+                    df = build_dataframe(results, cursor.description,
+                                         categorical_max_ratio=context.solid_config['categorical_max_ratio'])
+                phase.add(df=df)
+                count += len(df)
+
+                context.log.info(f'Loaded {len(df)} records in chunk {chunk}, {count} in total')
+
+                yield DynamicOutput(df, mapping_key=f'chunk_{chunk}')
+                chunk += 1
+
+            metrics.log(context)
+            yield ExpectationResult(success=True, label='performance', description='Streaming query performance',
+                                    metadata=metrics.metadata())
+
+        except psycopg2.Error as e:
+            context.log.error(f'Error: {e}')
+            if context.solid_config['fatal']:
+                raise e
+
+        finally:
+            # tidy up, closing the server-side cursor and ending its transaction
+            cursor.close()
+            client.commit()
+            context.resources.postgres_warehouse.release_connection(context, client)
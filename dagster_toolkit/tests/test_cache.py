@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import tempfile
+from time import time
+from unittest import TestCase
+
+import pandas as pd
+
+from dagster_toolkit.utils import DataFrameCache
+
+
+class TestDataFrameCache(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_put_get(self):
+        for file_format in ['parquet', 'feather']:
+            cache = DataFrameCache(self.cache_dir, file_format=file_format)
+            df = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+            cache.put(file_format, df, elapsed=1.5)
+
+            cached, meta = cache.get(file_format)
+
+            pd.testing.assert_frame_equal(cached, df)
+            self.assertEqual(meta['elapsed'], 1.5)
+
+    def test_restores_columns_and_index(self):
+        cache = DataFrameCache(self.cache_dir, file_format='feather')
+        df = pd.DataFrame({0: [1, 2], 1: [3, 4]}, index=pd.Index(['x', 'y'], name='key'))
+        cache.put('key', df)
+
+        cached, _ = cache.get('key')
+
+        pd.testing.assert_frame_equal(cached, df)
+
+    def test_miss(self):
+        cache = DataFrameCache(self.cache_dir)
+
+        self.assertEqual(cache.get('missing'), (None, None))
+
+    def test_ttl(self):
+        cache = DataFrameCache(self.cache_dir)
+        cache.put('key', pd.DataFrame({'a': [1]}))
+
+        self.assertIsNotNone(cache.get('key', ttl=60)[0])
+
+        # age the entry
+        meta_path = os.path.join(self.cache_dir, 'key.json')
+        with open(meta_path, 'r') as fhandle:
+            meta = json.load(fhandle)
+        meta['created'] = time() - 120
+        with open(meta_path, 'w') as fhandle:
+            json.dump(meta, fhandle)
+
+        self.assertIsNone(cache.get('key', ttl=60)[0])
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_lru_eviction(self):
+        cache = DataFrameCache(self.cache_dir)
+        df = pd.DataFrame({'a': range(1000)})
+        for index, key in enumerate(['first', 'second', 'third']):
+            cache.put(key, df)
+            # distinct last used times, oldest first
+            os.utime(os.path.join(self.cache_dir, f'{key}.json'), (index, index))
+        entry_size = cache.size() // 3
+
+        # using the first entry makes the second the least recently used
+        cache.get('first')
+        removed = cache.evict(entry_size * 2)
+
+        self.assertEqual(removed, ['second'])
+        self.assertIsNotNone(cache.get('first')[0])
+        self.assertIsNotNone(cache.get('third')[0])
+
+    def test_invalidate(self):
+        cache = DataFrameCache(self.cache_dir)
+        cache.put('sales', pd.DataFrame({'a': [1]}), tags=['sales', 'public.sales'])
+        cache.put('stock', pd.DataFrame({'a': [1]}), tags=['stock'])
+
+        self.assertEqual(cache.invalidate('sales'), ['sales'])
+        self.assertIsNone(cache.get('sales')[0])
+        self.assertIsNotNone(cache.get('stock')[0])
+
+    def test_invalidate_keep(self):
+        cache = DataFrameCache(self.cache_dir)
+        cache.put('old', pd.DataFrame({'a': [1]}), tags=['data.csv'], file_stat=[10, 1.5])
+        cache.put('current', pd.DataFrame({'a': [1]}), tags=['data.csv'], file_stat=[12, 2.5])
+
+        self.assertEqual(cache.invalidate('data.csv', keep={'file_stat': [12, 2.5]}), ['old'])
+        self.assertIsNotNone(cache.get('current')[0])
+
+    def test_failed_put_leaves_no_files(self):
+        cache = DataFrameCache(self.cache_dir, file_format='feather')
+
+        # mixed types can't be converted to an arrow column
+        with self.assertRaises(Exception):
+            cache.put('key', pd.DataFrame({'a': [1, 'x', 2.5]}))
+
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        self.assertEqual(cache.get('key'), (None, None))
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from dagster_toolkit.postgres.catalog import split_table_name, resolve_table
+
+
+class TestSplitTableName(TestCase):
+
+    def test_unqualified(self):
+        self.assertEqual(split_table_name('Sales'), (None, 'sales'))
+
+    def test_qualified(self):
+        self.assertEqual(split_table_name('Staging.Sales'), ('staging', 'sales'))
+        self.assertEqual(split_table_name(' staging . sales '), ('staging', 'sales'))
+
+    def test_quoted(self):
+        self.assertEqual(split_table_name('"Staging"."Sales"'), ('Staging', 'Sales'))
+        self.assertEqual(split_table_name('"my schema"."Ta""ble"'), ('my schema', 'Ta"ble'))
+        self.assertEqual(split_table_name('"a.b"'), (None, 'a.b'))
+
+    def test_database_qualified(self):
+        self.assertEqual(split_table_name('warehouse.staging.sales'), ('staging', 'sales'))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            split_table_name('')
+
+
+class TestResolveTable(TestCase):
+
+    catalog = {('public', 'sales'), ('staging', 'stock'), ('staging', 'sales'), ('public', 'Orders')}
+
+    def test_qualified(self):
+        self.assertEqual(resolve_table('staging.stock', self.catalog, ['public']), ('staging', 'stock'))
+        self.assertIsNone(resolve_table('public.stock', self.catalog, ['staging', 'public']))
+
+    def test_unqualified_search_path_order(self):
+        self.assertEqual(resolve_table('SALES', self.catalog, ['public']), ('public', 'sales'))
+        self.assertEqual(resolve_table('sales', self.catalog, ['staging', 'public']), ('staging', 'sales'))
+        # not in the first schema of the path, e.g. "$user", public with a schema for the user
+        self.assertEqual(resolve_table('stock', self.catalog, ['analyst', 'staging']), ('staging', 'stock'))
+
+    def test_missing(self):
+        # only in a schema which isn't in the search path
+        self.assertIsNone(resolve_table('stock', self.catalog, ['public']))
+        self.assertIsNone(resolve_table('sales', self.catalog, []))
+
+    def test_quoted_case_sensitive(self):
+        self.assertIsNone(resolve_table('"Sales"', self.catalog, ['public']))
+        self.assertIsNone(resolve_table('orders', self.catalog, ['public']))
+        self.assertEqual(resolve_table('"Orders"', self.catalog, ['public']), ('public', 'Orders'))
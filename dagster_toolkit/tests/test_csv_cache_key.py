@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from dagster import execute_solid
+
+from dagster_toolkit.files.read_csv_node import csv_cache_key, load_csv
+from dagster_toolkit.utils import DataFrameCache
+
+
+class TestCsvCacheKey(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.directory, 'data.csv')
+        with open(self.csv_path, 'w') as fhandle:
+            fhandle.write('a,b\n1,2\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_stable(self):
+        key = csv_cache_key(self.csv_path, {'sep': ',', 'header': 0}, {'compact': True})
+
+        self.assertEqual(key, csv_cache_key(self.csv_path, {'header': 0, 'sep': ','}, {'compact': True}))
+
+    def test_arguments_change_key(self):
+        key = csv_cache_key(self.csv_path, {'sep': ','}, {'compact': True})
+
+        self.assertNotEqual(key, csv_cache_key(self.csv_path, {'sep': ';'}, {'compact': True}))
+        self.assertNotEqual(key, csv_cache_key(self.csv_path, {'sep': ','}, {'compact': False}))
+        self.assertNotEqual(key, csv_cache_key(self.csv_path, {'sep': ','}))
+
+    def test_modification_changes_key(self):
+        key = csv_cache_key(self.csv_path, {})
+        with open(self.csv_path, 'a') as fhandle:
+            fhandle.write('3,4\n')
+
+        self.assertNotEqual(key, csv_cache_key(self.csv_path, {}))
+
+    def test_touch_changes_key(self):
+        key = csv_cache_key(self.csv_path, {})
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, (stat.st_atime, stat.st_mtime + 10))
+
+        self.assertNotEqual(key, csv_cache_key(self.csv_path, {}))
+
+
+class TestLoadCsvCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.csv_path = os.path.join(self.directory, 'data.csv')
+        with open(self.csv_path, 'w') as fhandle:
+            fhandle.write('a,b\n1,2\n3,4\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, kwargs):
+        run_config = {'solids': {'load_csv': {'config': {'cache': {'cache_dir': self.cache_dir}}}}}
+        result = execute_solid(load_csv, input_values={'csv_path': self.csv_path, 'kwargs': kwargs},
+                               run_config=run_config)
+        return result.output_value(), result.output_events_during_compute[0].event_specific_data.metadata_entries
+
+    def cache_status(self, kwargs):
+        _, entries = self.load(kwargs)
+        return [entry.entry_data.text for entry in entries if entry.label == 'cache'][0]
+
+    def test_other_arguments_kept(self):
+        # entries for the same version of the file loaded with different arguments coexist
+        statuses = [self.cache_status(kwargs) for kwargs in [{}, {'usecols': ['a']}, {}, {'usecols': ['a']}]]
+
+        self.assertEqual(statuses, ['miss', 'miss', 'hit', 'hit'])
+        self.assertEqual(len(DataFrameCache(self.cache_dir)._entries()), 2)
+
+    def test_modified_file_invalidated(self):
+        self.load({})
+        self.load({'usecols': ['a']})
+        with open(self.csv_path, 'a') as fhandle:
+            fhandle.write('5,6\n')
+
+        df, _ = self.load({})
+
+        self.assertEqual(len(df), 3)
+        self.assertEqual(len(DataFrameCache(self.cache_dir)._entries()), 1)
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from dagster_toolkit.utils import categorize, compact_dataframe, downcast_numeric, memory_usage
+
+
+class TestDowncastNumeric(TestCase):
+
+    def test_non_negative_signed(self):
+        values = downcast_numeric(pd.Series([0, 200, 255], dtype='int64'))
+
+        self.assertEqual(values.dtype, np.int16)
+        self.assertEqual(values.tolist(), [0, 200, 255])
+
+    def test_arithmetic_does_not_wrap(self):
+        a = downcast_numeric(pd.Series([1, 2, 3], dtype='int64'))
+        b = downcast_numeric(pd.Series([2, 3, 4], dtype='int64'))
+
+        self.assertEqual((a - b).tolist(), [-1, -1, -1])
+
+    def test_signed(self):
+        values = downcast_numeric(pd.Series([-1, 30000], dtype='int64'))
+
+        self.assertEqual(values.dtype, np.int16)
+
+    def test_lossless_float(self):
+        values = downcast_numeric(pd.Series([0.5, 1.25, np.nan]))
+
+        self.assertEqual(values.dtype, np.float32)
+
+    def test_lossy_float_kept(self):
+        values = pd.Series([0.1, 1 / 3])
+
+        self.assertEqual(downcast_numeric(values).dtype, np.float64)
+
+    def test_unchanged_types(self):
+        for values in [pd.Series([True, False]), pd.Series([1, None], dtype='Int64'), pd.Series(['a', 'b'])]:
+            self.assertIs(downcast_numeric(values), values)
+
+
+class TestCategorize(TestCase):
+
+    def test_few_unique(self):
+        values = categorize(pd.Series(['a', 'b', 'a', 'a']), 0.5)
+
+        self.assertEqual(values.dtype, 'category')
+
+    def test_many_unique(self):
+        values = pd.Series(['a', 'b', 'c', 'a'])
+
+        self.assertIs(categorize(values, 0.5), values)
+
+    def test_numeric_and_empty(self):
+        for values in [pd.Series([1, 1, 1]), pd.Series([], dtype=object)]:
+            self.assertIs(categorize(values, 0.5), values)
+
+
+class TestCompactDataFrame(TestCase):
+
+    def setUp(self):
+        rows = 1000
+        self.df = pd.DataFrame({
+            'id': np.arange(rows, dtype='int64'),
+            'price': np.arange(rows, dtype='float64') / 4,
+            'region': ['north', 'south'] * (rows // 2),
+            'name': [f'name{index}' for index in range(rows)],
+        }, index=pd.RangeIndex(10, 10 + rows))
+
+    def test_compact(self):
+        compacted = compact_dataframe(self.df, category_max_ratio=0.5)
+
+        self.assertEqual(compacted['id'].dtype, np.int16)
+        self.assertEqual(compacted['price'].dtype, np.float32)
+        self.assertEqual(compacted['region'].dtype, 'category')
+        self.assertEqual(compacted['name'].dtype, self.df['name'].dtype)
+        self.assertLess(memory_usage(compacted), memory_usage(self.df))
+        # values, column order and index are preserved
+        pd.testing.assert_frame_equal(compacted, self.df, check_dtype=False, check_categorical=False)
+
+    def test_no_categories(self):
+        compacted = compact_dataframe(self.df)
+
+        self.assertEqual(compacted['region'].dtype, self.df['region'].dtype)
+
+    def test_duplicate_column_names(self):
+        df = pd.DataFrame([[1, 'a'], [2, 'a']], columns=['x', 'x'])
+
+        compacted = compact_dataframe(df, category_max_ratio=0.5)
+
+        self.assertEqual(compacted.columns.tolist(), ['x', 'x'])
+        self.assertEqual(compacted.dtypes.tolist(), [np.int8, 'category'])
@@ -0,0 +1,131 @@
+from unittest import TestCase
+
+import psycopg2
+from dagster import ModeDefinition, ResourceDefinition, execute_solid
+
+from dagster_toolkit.postgres.ddl_batch import ddl_batch, ddl_statements
+
+
+class TestDdlStatements(TestCase):
+
+    def test_drops_before_creates(self):
+        statements = ddl_statements(['a', 'b'], [('b', 'id integer'), ('c', 'id integer, name text')])
+
+        self.assertEqual(statements, [
+            'DROP TABLE IF EXISTS a',
+            'DROP TABLE IF EXISTS b',
+            'CREATE TABLE IF NOT EXISTS b (id integer)',
+            'CREATE TABLE IF NOT EXISTS c (id integer, name text)',
+        ])
+
+    def test_options(self):
+        statements = ddl_statements(['parent', 'child'], [('parent', 'id integer')],
+                                    cascade=True, reverse_drops=True, if_not_exists=False)
+
+        self.assertEqual(statements, [
+            'DROP TABLE IF EXISTS child CASCADE',
+            'DROP TABLE IF EXISTS parent CASCADE',
+            'CREATE TABLE parent (id integer)',
+        ])
+
+    def test_empty(self):
+        self.assertEqual(ddl_statements([], []), [])
+
+
+class FakeCursor(object):
+    def __init__(self, client):
+        self.client = client
+
+    def execute(self, sql):
+        if sql in self.client.failing:
+            raise psycopg2.ProgrammingError(f'failed: {sql}')
+        self.client.executed.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeClient(object):
+    """
+    PostgresDb stand-in which records the statements executed and whether they were committed
+    """
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.executed = []
+        self.committed = False
+        self.rolled_back = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def get_connection(self):
+        return self
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+class FakeWarehouse(object):
+    def __init__(self, client):
+        self.client = client
+        self.released = False
+        self.catalog_invalidated = False
+
+    def get_connection(self, context):
+        return self.client
+
+    def release_connection(self, context, client):
+        self.released = True
+
+    def invalidate_catalog(self):
+        self.catalog_invalidated = True
+
+
+def run_ddl_batch(warehouse, drop_tables, create_tables, fatal=True):
+    return execute_solid(
+        ddl_batch,
+        mode_def=ModeDefinition(resource_defs={
+            'postgres_warehouse': ResourceDefinition.hardcoded_resource(warehouse)
+        }),
+        input_values={'drop_tables': drop_tables, 'create_tables': create_tables},
+        run_config={'solids': {'ddl_batch': {'config': {'fatal': fatal}}}},
+        raise_on_error=False)
+
+
+class TestDdlBatch(TestCase):
+
+    def test_single_transaction(self):
+        warehouse = FakeWarehouse(FakeClient())
+
+        result = run_ddl_batch(warehouse, ['a'], [('a', 'id integer')])
+
+        self.assertTrue(result.success)
+        self.assertEqual(warehouse.client.executed,
+                         ['DROP TABLE IF EXISTS a', 'CREATE TABLE IF NOT EXISTS a (id integer)'])
+        self.assertTrue(warehouse.client.committed)
+        self.assertEqual([timing['sql'] for timing in result.output_value()], warehouse.client.executed)
+        self.assertTrue(warehouse.released)
+        self.assertTrue(warehouse.catalog_invalidated)
+
+    def test_error_rolls_back(self):
+        warehouse = FakeWarehouse(FakeClient(failing=['CREATE TABLE IF NOT EXISTS a (id integer)']))
+
+        result = run_ddl_batch(warehouse, ['a'], [('a', 'id integer')], fatal=False)
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.output_value(), [])
+        self.assertFalse(warehouse.client.committed)
+        self.assertTrue(warehouse.client.rolled_back)
+        self.assertTrue(warehouse.released)
+
+    def test_error_fatal(self):
+        warehouse = FakeWarehouse(FakeClient(failing=['DROP TABLE IF EXISTS a']))
+
+        result = run_ddl_batch(warehouse, ['a'], [])
+
+        self.assertFalse(result.success)
+        self.assertTrue(warehouse.client.rolled_back)
+        self.assertTrue(warehouse.released)
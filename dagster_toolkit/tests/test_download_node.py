@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from unittest import TestCase, mock
+
+import pandas as pd
+from bson import ObjectId
+
+from dagster_toolkit.mongo.download_node import (
+    cursor_to_dataframe, interpolate_bounds, iter_document_batches, partition_filters
+)
+
+
+class ListCursor(object):
+    """
+    pymongo cursor stand-in over a list of documents
+    """
+    def __init__(self, documents):
+        self.documents = documents
+        self.server_batch_size = None
+
+    def batch_size(self, batch_size):
+        self.server_batch_size = batch_size
+        return self
+
+    def __iter__(self):
+        return iter(self.documents)
+
+
+class TestIterDocumentBatches(TestCase):
+
+    def test_batches(self):
+        batches = list(iter_document_batches(iter(range(7)), 3))
+
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_empty(self):
+        self.assertEqual(list(iter_document_batches(iter([]), 3)), [])
+
+
+class TestCursorToDataFrame(TestCase):
+
+    documents = [{'a': index, 'b': f'x{index}'} for index in range(5)] + [{'a': 5, 'c': True}]
+
+    def test_batched_matches_unbatched(self):
+        expected = cursor_to_dataframe(mock.MagicMock(), ListCursor(self.documents), 0)
+        cursor = ListCursor(self.documents)
+
+        df = cursor_to_dataframe(mock.MagicMock(), cursor, 2)
+
+        pd.testing.assert_frame_equal(df, expected)
+        self.assertEqual(cursor.server_batch_size, 2)
+
+    def test_batched_empty(self):
+        df = cursor_to_dataframe(mock.MagicMock(), ListCursor([]), 2)
+
+        self.assertEqual(len(df), 0)
+
+
+class TestInterpolateBounds(TestCase):
+
+    def test_numbers(self):
+        self.assertEqual(interpolate_bounds(0, 100, 4), [0, 25, 50, 75, 100])
+
+    def test_datetimes(self):
+        low = datetime(2021, 1, 1)
+        high = datetime(2021, 1, 5)
+
+        bounds = interpolate_bounds(low, high, 2)
+
+        self.assertEqual(bounds, [low, datetime(2021, 1, 3), high])
+
+    def test_object_ids(self):
+        low = ObjectId.from_datetime(datetime(2021, 1, 1, tzinfo=timezone.utc))
+        high = ObjectId.from_datetime(datetime(2021, 1, 3, tzinfo=timezone.utc))
+
+        bounds = interpolate_bounds(low, high, 2)
+
+        # the end bounds are the actual values, the inner bounds split on the ObjectId timestamps
+        self.assertEqual(len(bounds), 3)
+        self.assertIs(bounds[0], low)
+        self.assertIs(bounds[-1], high)
+        self.assertEqual(bounds[1].generation_time, datetime(2021, 1, 2, tzinfo=timezone.utc))
+
+    def test_unsupported(self):
+        for low, high in [('a', 'z'), (False, True), (0, 'z')]:
+            with self.assertRaises(ValueError):
+                interpolate_bounds(low, high, 2)
+
+
+class TestPartitionFilters(TestCase):
+
+    def test_ranges(self):
+        filters = partition_filters(None, 'n', [0, 10, 20])
+
+        # each partition includes its lower bound, the last also its upper bound
+        self.assertEqual(filters, [
+            {'n': {'$gte': 0, '$lt': 10}},
+            {'n': {'$gte': 10, '$lte': 20}},
+        ])
+
+    def test_combined_with_filter(self):
+        sel_filter = {'region': 'west'}
+
+        filters = partition_filters(sel_filter, 'n', [0, 10])
+
+        self.assertEqual(filters, [{'$and': [sel_filter, {'n': {'$gte': 0, '$lte': 10}}]}])
+
+    def test_no_partitions(self):
+        self.assertEqual(partition_filters({'region': 'west'}, 'n', []), [])
+        self.assertEqual(partition_filters(None, 'n', [5]), [])
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import TestCase
+
+import pandas as pd
+
+from dagster_toolkit.postgres.dtypes import (
+    build_dataframe, copy_read_csv_args, convert_copy_columns, COPY_NULL, INT8_OID, INT4_OID, TEXT_OID, TIMESTAMP_OID,
+    TIMESTAMPTZ_OID, BOOL_OID
+)
+
+DESCRIPTION = [('id', INT8_OID), ('count', INT4_OID), ('name', TEXT_OID), ('created', TIMESTAMP_OID),
+               ('flag', BOOL_OID)]
+
+
+class TestBuildDataframe(TestCase):
+
+    def test_nullable_int8_lossless(self):
+        big = 2 ** 53 + 1
+        df = build_dataframe([(big, 1, 'a', datetime(2020, 1, 1), True),
+                              (None, None, None, None, None)], DESCRIPTION)
+
+        self.assertEqual(str(df['id'].dtype), 'Int64')
+        self.assertEqual(df['id'][0], big)
+        self.assertTrue(df['id'].isna()[1])
+
+    def test_dtypes(self):
+        df = build_dataframe([(1, 2, 'a', datetime(2020, 1, 1), False)], DESCRIPTION)
+
+        self.assertEqual(list(df.columns), ['id', 'count', 'name', 'created', 'flag'])
+        self.assertEqual(str(df['count'].dtype), 'Int32')
+        self.assertEqual(str(df['flag'].dtype), 'boolean')
+        self.assertTrue(str(df['created'].dtype).startswith('datetime64'))
+        self.assertEqual(df['name'][0], 'a')
+
+    def test_empty(self):
+        df = build_dataframe([], DESCRIPTION)
+
+        self.assertEqual(len(df), 0)
+        self.assertEqual(list(df.columns), ['id', 'count', 'name', 'created', 'flag'])
+        self.assertEqual(str(df['id'].dtype), 'Int64')
+
+    def test_duplicate_column_names(self):
+        df = build_dataframe([(1, 2)], [('id', INT8_OID), ('id', INT4_OID)])
+
+        self.assertEqual(list(df.columns), ['id', 'id'])
+        self.assertEqual(df.iloc[0, 1], 2)
+
+
+class TestCopyReadCsvArgs(TestCase):
+
+    def test_copy_matches_fetch(self):
+        description = [('name', TEXT_OID), ('count', INT4_OID)]
+        records = [('NA', 1), ('null', None), ('NaN', 3), ('', 4), (None, 5)]
+        # csv as written by COPY ... TO STDOUT WITH (FORMAT csv, NULL COPY_NULL); empty strings are quoted
+        copy_output = f'NA,1\nnull,{COPY_NULL}\nNaN,3\n"",4\n{COPY_NULL},5\n'
+
+        copied = pd.read_csv(StringIO(copy_output), **copy_read_csv_args(description))
+        fetched = build_dataframe(records, description)
+
+        self.assertEqual(copied['name'].tolist()[:4], ['NA', 'null', 'NaN', ''])
+        self.assertTrue(pd.isna(copied['name'][4]))
+        self.assertTrue(copied['count'].isna()[1])
+        self.assertEqual(str(copied['count'].dtype), 'Int32')
+        pd.testing.assert_series_equal(copied['count'], fetched['count'])
+        self.assertEqual(copied['name'].isna().tolist(), fetched['name'].isna().tolist())
+        self.assertEqual(copied['name'].dropna().tolist(), fetched['name'].dropna().tolist())
+
+    def test_timestamptz_mixed_offsets(self):
+        description = [('id', INT4_OID), ('updated', TIMESTAMPTZ_OID)]
+        # output in a session timezone with daylight saving time, e.g. Europe/Dublin
+        records = [(1, datetime(2021, 3, 28, 0, 30, tzinfo=timezone(timedelta(hours=0)))),
+                   (2, datetime(2021, 3, 28, 2, 30, tzinfo=timezone(timedelta(hours=1)))),
+                   (3, None)]
+        copy_output = f'1,2021-03-28 00:30:00+00\n2,2021-03-28 02:30:00+01\n3,{COPY_NULL}\n'
+
+        copied = convert_copy_columns(pd.read_csv(StringIO(copy_output), **copy_read_csv_args(description)),
+                                      description)
+        fetched = build_dataframe(records, description)
+
+        self.assertEqual(str(copied['updated'].dtype.tz), 'UTC')
+        self.assertEqual(copied['updated'][1], pd.Timestamp('2021-03-28 01:30:00', tz='UTC'))
+        self.assertTrue(copied['updated'].isna()[2])
+        pd.testing.assert_series_equal(copied['updated'], fetched['updated'])
+
+    def test_copy_categorical_matches_fetch(self):
+        description = [('region', TEXT_OID), ('count', INT4_OID)]
+        records = [('north', 1), ('south', 2), ('north', 3), ('north', 4)]
+        copy_output = 'north,1\nsouth,2\nnorth,3\nnorth,4\n'
+
+        copied = convert_copy_columns(pd.read_csv(StringIO(copy_output), **copy_read_csv_args(description)),
+                                      description, categorical_max_ratio=0.5)
+        fetched = build_dataframe(records, description, categorical_max_ratio=0.5)
+
+        self.assertEqual(str(copied['region'].dtype), 'category')
+        self.assertEqual(str(copied['count'].dtype), 'Int32')
+        pd.testing.assert_series_equal(copied['region'], fetched['region'])
@@ -51,3 +51,114 @@ class TestEnvironmentDict(TestCase):
         self.assertTrue('resources' in environ._e_dict.keys())
         self.assertTrue('new_resource' in environ._e_dict['resources'].keys())
         self.assertEqual(environ._e_dict['resources']['new_resource'], 'resource_value')
+
+    def test_add_solid_input_after_add_solid(self):
+        environ = EnvironmentDict()
+        environ.add_solid('new_solid')
+        environ.add_solid_input('new_solid', 'solid_ip', 'ip_value')
+
+        self.assertEqual(environ._e_dict['solids']['new_solid']['inputs']['solid_ip']['value'], 'ip_value')
+
+    def test_add_solid_inputs(self):
+        environ = EnvironmentDict()
+        environ.add_solid_inputs([
+            ('new_solid', 'solid_ip', 'ip_value'),
+            ('new_solid', 'other_ip', 'other_value'),
+            (('new_composite', 'child_solid'), 'solid_ip', 'child_value'),
+            (('outer', 'inner', 'child_solid'), 'solid_ip', 'nested_value'),
+        ])
+
+        expected = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', 'ip_value') \
+            .add_solid_input('new_solid', 'other_ip', 'other_value') \
+            .add_composite_solid_input('new_composite', 'child_solid', 'solid_ip', 'child_value')
+        self.assertEqual(environ._e_dict['solids']['new_solid'], expected._e_dict['solids']['new_solid'])
+        self.assertEqual(environ._e_dict['solids']['new_composite'], expected._e_dict['solids']['new_composite'])
+        self.assertEqual(
+            environ._e_dict['solids']['outer']['solids']['inner']['solids']['child_solid']['inputs']['solid_ip'],
+            {'value': 'nested_value'})
+
+    def test_add_solid_inputs_mapping(self):
+        environ = EnvironmentDict()
+        environ.add_solid_inputs({
+            'new_solid': {'solid_ip': 'ip_value'},
+            ('new_composite', 'child_solid'): {'solid_ip': 'child_value'},
+        })
+
+        self.assertEqual(environ._e_dict['solids']['new_solid']['inputs']['solid_ip']['value'], 'ip_value')
+        self.assertEqual(
+            environ._e_dict['solids']['new_composite']['solids']['child_solid']['inputs']['solid_ip']['value'],
+            'child_value')
+
+    def test_add_solid_inputs_invalid_name(self):
+        environ = EnvironmentDict()
+        with self.assertRaises(ValueError):
+            environ.add_solid_inputs([('', 'solid_ip', 'ip_value')])
+        with self.assertRaises(ValueError):
+            environ.add_solid_inputs([('new_solid', None, 'ip_value')])
+
+    def test_build_deep(self):
+        environ = EnvironmentDict()
+        environ.add_solid_input('new_solid', 'solid_ip', 'ip_value')
+
+        built = environ.build(deep=True)
+        built['solids']['new_solid']['inputs']['solid_ip']['value'] = 'changed'
+
+        self.assertEqual(environ._e_dict['solids']['new_solid']['inputs']['solid_ip']['value'], 'ip_value')
+
+    @staticmethod
+    def _full_hash(environ):
+        # recalculate from scratch, to compare with the incrementally maintained hash
+        other = EnvironmentDict()
+        other._e_dict = {}
+        other._hash = 0
+        for key, value in environ._e_dict.items():
+            other._set_item(other._e_dict, (), key, value)
+        return other.content_hash()
+
+    def test_content_hash_incremental(self):
+        environ = EnvironmentDict()
+        self.assertEqual(environ.content_hash(), self._full_hash(environ))
+
+        environ.add_solid('new_solid')
+        environ.add_solid_input('new_solid', 'solid_ip', 'ip_value')
+        environ.add_solid_input('new_solid', 'solid_ip', 'other_value')
+        environ.add_composite_solid('new_composite', 'child_solid')
+        environ.add_composite_solid_input('new_composite', 'child_solid', 'solid_ip', 'ip_value')
+        environ.add_solid_inputs([(('outer', 'inner'), 'solid_ip', 1)])
+        environ.add_resource('new_resource', {'config': {'path': 'value'}})
+
+        self.assertEqual(environ.content_hash(), self._full_hash(environ))
+
+    def test_content_hash_order_independent(self):
+        first = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', 'ip_value') \
+            .add_resource('new_resource', 'resource_value')
+        second = EnvironmentDict() \
+            .add_resource('new_resource', 'resource_value') \
+            .add_solid_input('new_solid', 'solid_ip', 'ip_value')
+        third = EnvironmentDict() \
+            .add_resource('new_resource', 'resource_value') \
+            .add_solid_input('new_solid', 'solid_ip', 'other_value')
+
+        self.assertEqual(first.content_hash(), second.content_hash())
+        self.assertNotEqual(first.content_hash(), third.content_hash())
+
+    def test_to_json(self):
+        first = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', 'ip_value') \
+            .add_resource('new_resource', {'b': 1, 'a': 2})
+        second = EnvironmentDict() \
+            .add_resource('new_resource', {'a': 2, 'b': 1}) \
+            .add_solid_input('new_solid', 'solid_ip', 'ip_value')
+
+        self.assertEqual(first.to_json(), second.to_json())
+        self.assertEqual(first.to_json(),
+                         '{"resources":{"new_resource":{"a":2,"b":1}},'
+                         '"solids":{"new_solid":{"inputs":{"solid_ip":{"value":"ip_value"}}}}}')
+
+    def test_to_yaml(self):
+        environ = EnvironmentDict() \
+            .add_resource('new_resource', {'b': 1, 'a': 2})
+
+        self.assertEqual(environ.to_yaml(), 'resources:\n  new_resource:\n    a: 2\n    b: 1\nsolids: {}\n')
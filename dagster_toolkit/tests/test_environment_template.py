@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from environ import EnvironmentDict, TemplateParam
+
+
+class TestEnvironmentTemplate(TestCase):
+    def test_render(self):
+        template = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', TemplateParam('date')) \
+            .add_solid_input('other_solid', 'solid_ip', 'ip_value') \
+            .template()
+
+        rendered = template.render({'date': '2020-01-01'})
+
+        expected = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', '2020-01-01') \
+            .add_solid_input('other_solid', 'solid_ip', 'ip_value') \
+            .build()
+        self.assertEqual(rendered, expected)
+
+    def test_render_shares_unparameterised(self):
+        template = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', TemplateParam('date')) \
+            .add_solid_input('other_solid', 'solid_ip', 'ip_value') \
+            .template()
+
+        first = template.render({'date': '2020-01-01'})
+        second = template.render({'date': '2020-01-02'})
+
+        self.assertEqual(first['solids']['new_solid']['inputs']['solid_ip']['value'], '2020-01-01')
+        self.assertEqual(second['solids']['new_solid']['inputs']['solid_ip']['value'], '2020-01-02')
+        self.assertIsNot(first['solids']['new_solid'], second['solids']['new_solid'])
+        self.assertIs(first['solids']['other_solid'], second['solids']['other_solid'])
+
+    def test_render_composite_and_resource(self):
+        template = EnvironmentDict() \
+            .add_composite_solid_input('new_solid', 'child_solid', 'solid_ip', TemplateParam('date')) \
+            .add_resource('new_resource', {'config': {'table': TemplateParam('table')}}) \
+            .template()
+
+        rendered = template.render({'date': '2020-01-01', 'table': 'sales'})
+
+        self.assertEqual(
+            rendered['solids']['new_solid']['solids']['child_solid']['inputs']['solid_ip']['value'], '2020-01-01')
+        self.assertEqual(rendered['resources']['new_resource']['config']['table'], 'sales')
+
+    def test_render_missing_param(self):
+        template = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', TemplateParam('date')) \
+            .template()
+
+        with self.assertRaises(ValueError):
+            template.render({})
+
+    def test_iter_render(self):
+        template = EnvironmentDict() \
+            .add_solid_input('new_solid', 'solid_ip', TemplateParam('date')) \
+            .template()
+
+        dates = [f'2020-01-{day:02d}' for day in range(1, 11)]
+        rendered = template.iter_render({'date': date} for date in dates)
+
+        self.assertNotIsInstance(rendered, list)
+        self.assertEqual([e_dict['solids']['new_solid']['inputs']['solid_ip']['value'] for e_dict in rendered],
+                         dates)
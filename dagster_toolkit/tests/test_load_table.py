@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from dagster_toolkit.postgres.load_table import COPY_NULL, copy_dataframe, integral_floats_to_int, quote_identifier
+
+
+class CopyCursor(object):
+    """
+    Cursor which records the data copied to it
+    """
+    def __init__(self):
+        self.copies = []
+
+    def copy_expert(self, sql, buffer):
+        self.copies.append((sql, buffer.read()))
+
+
+class TestIntegralFloatsToInt(TestCase):
+
+    def test_integral_with_missing(self):
+        df = integral_floats_to_int(pd.DataFrame({'count': [1.0, np.nan, 3.0], 'price': [1.5, 2.0, np.nan]}))
+
+        self.assertEqual(str(df['count'].dtype), 'Int64')
+        self.assertEqual(str(df['price'].dtype), 'float64')
+
+    def test_unchanged(self):
+        df = pd.DataFrame({'count': [1, 2], 'name': ['a', 'b']})
+
+        self.assertIs(integral_floats_to_int(df), df)
+
+
+class TestCopyDataframe(TestCase):
+
+    def test_copy(self):
+        cursor = CopyCursor()
+        df = pd.DataFrame({'id': [1.0, np.nan, 3.0], 'name': ['a', None, 'c']})
+
+        count = copy_dataframe(cursor, df, 'sales', 2)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(len(cursor.copies), 2)
+        self.assertEqual(cursor.copies[0][0],
+                         f'''COPY sales ("id", "name") FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')''')
+        self.assertEqual(''.join([data for _, data in cursor.copies]), f'1,a\n{COPY_NULL},{COPY_NULL}\n3,c\n')
+
+    def test_empty_string_distinct_from_null(self):
+        cursor = CopyCursor()
+        df = pd.DataFrame({'name': ['', None, 'x', np.nan], 'when': pd.to_datetime(['2021-01-01', None, None, None])})
+
+        copy_dataframe(cursor, df, 'sales', 10)
+
+        rows = cursor.copies[0][1].splitlines()
+        self.assertEqual(rows[0], ',2021-01-01')
+        self.assertEqual(rows[1:], [f'{COPY_NULL},{COPY_NULL}', f'x,{COPY_NULL}', f'{COPY_NULL},{COPY_NULL}'])
+
+    def test_quote_identifier(self):
+        self.assertEqual(quote_identifier('my "col"'), '"my ""col"""')
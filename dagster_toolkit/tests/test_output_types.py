@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from dagster_toolkit.files.read_csv_node import load_csv, load_csv_files
+from dagster_toolkit.postgres.create_table import does_psql_table_exist
+from dagster_toolkit.postgres.ddl_batch import ddl_batch
+from dagster_toolkit.postgres.load_table import load_dataframe
+from dagster_toolkit.postgres.read_table import multi_query_table, query_table
+
+
+class TestOutputTypes(TestCase):
+    """
+    Solids which yield Output must declare their output types, as the return annotation of a generator is ignored
+    """
+
+    def assertOutputType(self, solid_def, display_name):
+        self.assertEqual([output_def.dagster_type.display_name for output_def in solid_def.output_defs],
+                         [display_name])
+
+    def test_postgres(self):
+        self.assertOutputType(does_psql_table_exist, 'Bool')
+        self.assertOutputType(ddl_batch, '[Any]')
+        self.assertOutputType(load_dataframe, 'Int')
+        self.assertOutputType(multi_query_table, '[PandasDataFrame?]')
+        self.assertOutputType(query_table, 'PandasDataFrame?')
+
+    def test_files(self):
+        self.assertOutputType(load_csv, 'PandasDataFrame')
+        self.assertOutputType(load_csv_files, 'PandasDataFrame')
@@ -0,0 +1,208 @@
+import threading
+from unittest import TestCase, mock
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from dagster_toolkit.postgres.pool import PostgresPool, PoolTimeout, get_pool
+
+
+class FakeConnection(object):
+    """
+    psycopg2 connection stand-in
+    """
+    def __init__(self):
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+
+class FakeClient(object):
+    """
+    PostgresDb stand-in
+    """
+    def __init__(self):
+        self.connection = FakeConnection()
+
+    def get_connection(self):
+        return self.connection
+
+    def close_connection(self):
+        self.connection.closed = 1
+
+
+class FakeFactory(object):
+    """
+    Connection factory which records the clients it creates
+    """
+    def __init__(self):
+        self.clients = []
+
+    def __call__(self):
+        client = FakeClient()
+        self.clients.append(client)
+        return client
+
+
+class TestPostgresPool(TestCase):
+
+    def setUp(self):
+        self.factory = FakeFactory()
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            PostgresPool(self.factory, max_size=0)
+        with self.assertRaises(ValueError):
+            PostgresPool(self.factory, min_size=3, max_size=2)
+
+    def test_checkout_checkin_reuses_connection(self):
+        pool = PostgresPool(self.factory, max_size=2)
+        client, _ = pool.checkout()
+        pool.checkin(client)
+
+        reused, _ = pool.checkout()
+
+        self.assertIs(reused, client)
+        self.assertEqual(len(self.factory.clients), 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_checkout_creates_up_to_max_size(self):
+        pool = PostgresPool(self.factory, max_size=2, checkout_timeout=0.05)
+        first, _ = pool.checkout()
+        second, _ = pool.checkout()
+
+        self.assertIsNot(first, second)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        self.assertEqual(pool.stats()['size'], 2)
+
+    def test_failed_connect_releases_slot(self):
+        pool = PostgresPool(lambda: None, max_size=1)
+
+        client, _ = pool.checkout()
+
+        self.assertIsNone(client)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_checkin_rolls_back_open_transaction(self):
+        pool = PostgresPool(self.factory)
+        client, _ = pool.checkout()
+        client.connection.status = TRANSACTION_STATUS_INTRANS
+
+        pool.checkin(client)
+
+        self.assertEqual(client.connection.rollbacks, 1)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_checkin_discards_closed_connection(self):
+        pool = PostgresPool(self.factory)
+        client, _ = pool.checkout()
+        client.connection.closed = 1
+
+        pool.checkin(client)
+
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+    def test_idle_timeout_eviction(self):
+        pool = PostgresPool(self.factory, min_size=1, max_size=3, idle_timeout=10.0)
+        now = [100.0]
+        with mock.patch('dagster_toolkit.postgres.pool.monotonic', lambda: now[0]):
+            clients = [pool.checkout()[0] for _ in range(3)]
+            for client in clients:
+                pool.checkin(client)
+                now[0] += 4.0
+            # returned 12, 8 and 4 seconds ago
+
+            client, _ = pool.checkout()
+
+        # only the oldest connection has expired, the most recently returned is reused
+        self.assertIs(client, clients[2])
+        self.assertTrue(clients[0].connection.closed)
+        self.assertFalse(clients[1].connection.closed)
+        self.assertEqual(pool.stats()['size'], 2)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_idle_timeout_keeps_min_size(self):
+        pool = PostgresPool(self.factory, min_size=1, max_size=3, idle_timeout=10.0)
+        now = [100.0]
+        with mock.patch('dagster_toolkit.postgres.pool.monotonic', lambda: now[0]):
+            clients = [pool.checkout()[0] for _ in range(3)]
+            for client in clients:
+                pool.checkin(client)
+            now[0] += 60.0
+
+            client, _ = pool.checkout()
+
+        # all have expired, but the most recently returned is kept as the minimum idle connection
+        self.assertIs(client, clients[2])
+        self.assertTrue(clients[0].connection.closed)
+        self.assertTrue(clients[1].connection.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_waiter_gets_returned_connection(self):
+        pool = PostgresPool(self.factory, max_size=1, checkout_timeout=5.0)
+        client, _ = pool.checkout()
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+        waiter.start()
+
+        pool.checkin(client)
+        waiter.join(5.0)
+
+        self.assertIs(result[0][0], client)
+        self.assertGreater(result[0][1], 0.0)
+
+    def test_wait_statistics(self):
+        pool = PostgresPool(self.factory)
+        now = [100.0]
+
+        def factory():
+            now[0] += 2.0
+            return self.factory()
+
+        pool._factory = factory
+        with mock.patch('dagster_toolkit.postgres.pool.monotonic', lambda: now[0]):
+            _, first_wait = pool.checkout()
+            now[0] += 1.0
+            _, second_wait = pool.checkout()
+
+        self.assertEqual(first_wait, 2.0)
+        self.assertEqual(second_wait, 2.0)
+        stats = pool.stats()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['total_wait'], 4.0)
+        self.assertEqual(stats['max_wait'], 2.0)
+
+    def test_close(self):
+        pool = PostgresPool(self.factory)
+        client, _ = pool.checkout()
+        pool.checkin(client)
+
+        pool.close()
+
+        self.assertTrue(client.connection.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class TestGetPool(TestCase):
+
+    def test_same_config_shares_pool(self):
+        factory = FakeFactory()
+        cfg = {'host': 'pool-test', 'dbname': 'shared'}
+
+        self.assertIs(get_pool(cfg, factory, max_size=4), get_pool(dict(cfg), factory, max_size=4))
+
+    def test_different_config_or_arguments(self):
+        factory = FakeFactory()
+        cfg = {'host': 'pool-test', 'dbname': 'keyed'}
+        pool = get_pool(cfg, factory, max_size=4)
+
+        self.assertIsNot(pool, get_pool({'host': 'pool-test', 'dbname': 'other'}, factory, max_size=4))
+        self.assertIsNot(pool, get_pool(cfg, factory, max_size=5))
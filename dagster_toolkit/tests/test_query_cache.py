@@ -0,0 +1,31 @@
+from unittest import TestCase
+
+from dagster_toolkit.postgres.read_table import query_cache_key, query_table_names
+
+OPTIONS = {'copy': False, 'categorical_max_ratio': None}
+
+
+class TestQueryCacheKey(TestCase):
+
+    def test_normalised_sql(self):
+        self.assertEqual(query_cache_key('SELECT *  FROM sales;', 'server', OPTIONS),
+                         query_cache_key(' SELECT *\n FROM sales', 'server', OPTIONS))
+
+    def test_result_options(self):
+        key = query_cache_key('SELECT * FROM sales', 'server', OPTIONS)
+
+        self.assertNotEqual(key, query_cache_key('SELECT * FROM sales', 'server', dict(OPTIONS, copy=True)))
+        self.assertNotEqual(key, query_cache_key('SELECT * FROM sales', 'server',
+                                                 dict(OPTIONS, categorical_max_ratio=0.5)))
+
+    def test_identity(self):
+        self.assertNotEqual(query_cache_key('SELECT * FROM sales', 'server', OPTIONS),
+                            query_cache_key('SELECT * FROM sales', 'other', OPTIONS))
+
+
+class TestQueryTableNames(TestCase):
+
+    def test_names(self):
+        names = query_table_names('SELECT * FROM public."Sales" s JOIN stock ON s.id = stock.id')
+
+        self.assertEqual(names, ['public.sales', 'sales', 'stock'])
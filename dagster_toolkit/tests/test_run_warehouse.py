@@ -0,0 +1,271 @@
+from unittest import TestCase, mock, skipIf
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR
+from dagster import (
+    Failure, ModeDefinition, InputDefinition, Nothing, Field, Bool, execute_pipeline, pipeline, solid
+)
+
+try:
+    from dagster_toolkit.postgres.connection import PostgresRunWarehouse, postgres_run_warehouse_resource
+except ImportError:
+    # db_toolkit is installed from github, see requirements.txt
+    PostgresRunWarehouse = None
+from dagster_toolkit.postgres.transaction import commit_run_transaction
+
+
+class FakeCursor(object):
+    """
+    psycopg2 cursor stand-in which tracks the savepoints and uncommitted statements of its connection
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def execute(self, sql, params=None):
+        connection = self.connection
+        connection.statements.append(sql)
+        if sql.startswith('ROLLBACK TO SAVEPOINT '):
+            marker = sql[len('ROLLBACK TO '):]
+            del connection.pending[connection.pending.index(marker) + 1:]
+            connection.status = TRANSACTION_STATUS_INTRANS
+            return
+        if connection.status == TRANSACTION_STATUS_INERROR:
+            raise psycopg2.InternalError('current transaction is aborted')
+        if sql in connection.failing:
+            connection.status = TRANSACTION_STATUS_INERROR
+            raise psycopg2.ProgrammingError(f'failed: {sql}')
+        if sql.startswith('RELEASE SAVEPOINT '):
+            connection.pending.remove(sql[len('RELEASE '):])
+        else:
+            connection.pending.append(sql)
+        connection.status = TRANSACTION_STATUS_INTRANS
+
+    def close(self):
+        pass
+
+
+class FakeConnection(object):
+    """
+    psycopg2 connection stand-in
+    """
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.status = TRANSACTION_STATUS_IDLE
+        self.statements = []
+        self.pending = []
+        self.committed = []
+        self.rollbacks = 0
+        self.closed = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def commit(self):
+        self.committed.extend([sql for sql in self.pending if not sql.startswith('SAVEPOINT ')])
+        self.pending = []
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.pending = []
+        self.status = TRANSACTION_STATUS_IDLE
+
+
+class FakeClient(object):
+    """
+    PostgresDb stand-in
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __getitem__(self, key):
+        return 'fake-host'
+
+    def cursor(self):
+        return self.connection.cursor()
+
+    def get_connection(self):
+        return self.connection
+
+    def commit(self):
+        self.connection.commit()
+
+    def close_connection(self):
+        self.connection.closed = 1
+
+
+def run_warehouse(connection, savepoints):
+    with mock.patch.object(PostgresRunWarehouse, '_open_client', lambda self: FakeClient(connection)):
+        return PostgresRunWarehouse({}, savepoints=savepoints)
+
+
+def execute_sql(client, sql, fatal):
+    """
+    Execute a statement, handling errors as the toolkit's solids do
+    """
+    cursor = client.cursor()
+    try:
+        cursor.execute(sql)
+        client.commit()
+    except psycopg2.Error:
+        client.get_connection().rollback()
+        if fatal:
+            raise
+    finally:
+        cursor.close()
+
+
+@skipIf(PostgresRunWarehouse is None, 'requires db_toolkit')
+class TestPostgresRunWarehouse(TestCase):
+
+    def setUp(self):
+        self.context = mock.MagicMock()
+
+    def test_commit_run(self):
+        connection = FakeConnection()
+        warehouse = run_warehouse(connection, savepoints=False)
+        client = warehouse.get_connection(self.context)
+        execute_sql(client, 'CREATE TABLE a (id integer)', fatal=True)
+        warehouse.release_connection(self.context, client)
+
+        # solids' commits are deferred
+        self.assertEqual(connection.committed, [])
+        warehouse.commit_run(self.context)
+        self.assertEqual(connection.committed, ['CREATE TABLE a (id integer)'])
+
+        warehouse.close(self.context)
+        self.assertTrue(connection.closed)
+
+    def test_teardown_rolls_back_uncommitted(self):
+        connection = FakeConnection()
+        warehouse = run_warehouse(connection, savepoints=True)
+        client = warehouse.get_connection(self.context)
+        execute_sql(client, 'CREATE TABLE a (id integer)', fatal=True)
+        warehouse.release_connection(self.context, client)
+
+        warehouse.close(self.context)
+
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertEqual(connection.committed, [])
+        self.assertTrue(connection.closed)
+
+    def test_savepoint_stack(self):
+        connection = FakeConnection()
+        warehouse = run_warehouse(connection, savepoints=True)
+        outer = warehouse.get_connection(self.context)
+        inner = warehouse.get_connection(self.context)
+
+        self.assertEqual((outer.savepoint, inner.savepoint), ('solid_0', 'solid_1'))
+        # releasing the outer savepoint also releases the inner, which is then not released again
+        warehouse.release_connection(self.context, outer)
+        warehouse.release_connection(self.context, inner)
+        self.assertEqual(connection.statements, ['SAVEPOINT solid_0', 'SAVEPOINT solid_1', 'RELEASE SAVEPOINT solid_0'])
+
+    def test_release_rolls_back_to_savepoint(self):
+        connection = FakeConnection(failing=['SELECT bad'])
+        warehouse = run_warehouse(connection, savepoints=True)
+        first = warehouse.get_connection(self.context)
+        execute_sql(first, 'CREATE TABLE a (id integer)', fatal=True)
+        warehouse.release_connection(self.context, first)
+
+        second = warehouse.get_connection(self.context)
+        with self.assertRaises(psycopg2.Error):
+            cursor = second.cursor()
+            cursor.execute('INSERT INTO a VALUES (1)')
+            cursor.execute('SELECT bad')
+        warehouse.release_connection(self.context, second)
+
+        self.assertEqual(connection.statements[-2:], ['ROLLBACK TO SAVEPOINT solid_1', 'RELEASE SAVEPOINT solid_1'])
+        warehouse.commit_run(self.context)
+        self.assertEqual(connection.committed, ['CREATE TABLE a (id integer)'])
+
+    def test_rollback_without_savepoint(self):
+        connection = FakeConnection(failing=['SELECT bad'])
+        warehouse = run_warehouse(connection, savepoints=False)
+        client = warehouse.get_connection(self.context)
+        execute_sql(client, 'CREATE TABLE a (id integer)', fatal=True)
+
+        # the error is left to the solid's fatal setting, but the run transaction may no longer be committed
+        execute_sql(client, 'SELECT bad', fatal=False)
+        warehouse.release_connection(self.context, client)
+        self.assertEqual(connection.rollbacks, 0)
+
+        with self.assertRaises(Failure):
+            warehouse.commit_run(self.context)
+        warehouse.close(self.context)
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertEqual(connection.committed, [])
+
+
+def sql_solid(name, sql):
+    """
+    Create a solid which executes a statement using the postgres_warehouse resource, after its 'start' input
+    """
+    @solid(name=name, required_resource_keys={'postgres_warehouse'},
+           input_defs=[InputDefinition('start', Nothing)],
+           config_schema={'fatal': Field(Bool, default_value=True, is_required=False)})
+    def _sql_solid(context):
+        client = context.resources.postgres_warehouse.get_connection(context)
+        try:
+            execute_sql(client, sql, context.solid_config['fatal'])
+        finally:
+            context.resources.postgres_warehouse.release_connection(context, client)
+    return _sql_solid
+
+
+create_a = sql_solid('create_a', 'CREATE TABLE a (id integer)')
+failing_query = sql_solid('failing_query', 'SELECT bad')
+create_b = sql_solid('create_b', 'CREATE TABLE b (id integer)')
+
+
+@skipIf(PostgresRunWarehouse is None, 'requires db_toolkit')
+class TestRunTransactionPipeline(TestCase):
+
+    def run_chain(self, savepoints, fatal):
+        connection = FakeConnection(failing=['SELECT bad'])
+
+        @pipeline(mode_defs=[ModeDefinition(resource_defs={'postgres_warehouse': postgres_run_warehouse_resource})])
+        def chain():
+            commit_run_transaction(create_b(failing_query(create_a())))
+
+        with mock.patch.object(PostgresRunWarehouse, '_open_client', lambda self: FakeClient(connection)):
+            result = execute_pipeline(chain, run_config={
+                'resources': {'postgres_warehouse': {'config': {'postgres_cfg': {}, 'savepoints': savepoints}}},
+                'solids': {'failing_query': {'config': {'fatal': fatal}}},
+            }, raise_on_error=False)
+        return result, connection
+
+    def test_savepoints(self):
+        result, connection = self.run_chain(savepoints=True, fatal=False)
+
+        # only the failed solid's changes are rolled back
+        self.assertTrue(result.success)
+        self.assertEqual(connection.committed, ['CREATE TABLE a (id integer)', 'CREATE TABLE b (id integer)'])
+        self.assertTrue(connection.closed)
+
+    def test_no_savepoints(self):
+        result, connection = self.run_chain(savepoints=False, fatal=False)
+
+        # the failed query isn't fatal, but nothing may be committed after it and teardown rolls everything back
+        self.assertFalse(result.success)
+        self.assertTrue(result.result_for_solid('failing_query').success)
+        self.assertEqual(connection.committed, [])
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertTrue(connection.closed)
+
+    def test_fatal(self):
+        result, connection = self.run_chain(savepoints=True, fatal=True)
+
+        self.assertFalse(result.success)
+        self.assertFalse(result.result_for_solid('failing_query').success)
+        self.assertEqual(connection.committed, [])
+        self.assertTrue(connection.closed)
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+
+from dagster_toolkit.mongo.watermark import WatermarkStore, include_field, python_value
+
+
+class TestWatermarkStore(TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir)
+
+    def test_unset(self):
+        self.assertIsNone(WatermarkStore(self.state_dir).get('mark'))
+
+    def test_set_get(self):
+        store = WatermarkStore(self.state_dir)
+        for mark in [42, datetime(2020, 1, 2, 3, 4, 5), ObjectId()]:
+            store.set('mark', mark)
+
+            self.assertEqual(WatermarkStore(self.state_dir).get('mark'), mark)
+
+    def test_keys_independent(self):
+        store = WatermarkStore(self.state_dir)
+        store.set('first', 1)
+        store.set('second', 2)
+
+        self.assertEqual(store.get('first'), 1)
+        self.assertEqual(store.get('second'), 2)
+
+
+class TestIncludeField(TestCase):
+
+    def test_none(self):
+        self.assertIsNone(include_field(None, 'updated'))
+
+    def test_list(self):
+        self.assertEqual(include_field(['name'], 'updated'), ['name', 'updated'])
+        self.assertEqual(include_field(['name', 'updated'], 'updated'), ['name', 'updated'])
+        self.assertEqual(include_field(['name'], '_id'), ['name'])
+
+    def test_inclusion_dict(self):
+        self.assertEqual(include_field({'name': True}, 'updated'), {'name': True, 'updated': True})
+
+    def test_exclusion_dict(self):
+        self.assertEqual(include_field({'updated': False, 'notes': False}, 'updated'), {'notes': False})
+        self.assertEqual(include_field({'notes': False}, 'updated'), {'notes': False})
+
+
+class TestPythonValue(TestCase):
+
+    def test_values(self):
+        self.assertIsInstance(python_value(np.int64(3)), int)
+        self.assertIsInstance(python_value(pd.Timestamp('2020-01-01')), datetime)
+        self.assertEqual(python_value('text'), 'text')
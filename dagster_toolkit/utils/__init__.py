@@ -0,0 +1,46 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from dagster_toolkit.lazy import install_lazy_attributes
+
+# attributes are imported from their submodules on first access, so only the dependencies which are used get loaded
+install_lazy_attributes(__name__, {
+    'DataFrameCache': '.cache',
+    'memory_usage': '.dataframe',
+    'categorize': '.dataframe',
+    'downcast_numeric': '.dataframe',
+    'compact_dataframe': '.dataframe',
+    'SolidMetrics': '.instrumentation',
+    'approximate_size': '.instrumentation',
+})
+
+
+# if somebody does "from dagster_toolkit.utils import *", this is what they will
+# be able to access:
+__all__ = [
+    'DataFrameCache',
+    'memory_usage',
+    'categorize',
+    'downcast_numeric',
+    'compact_dataframe',
+    'SolidMetrics',
+    'approximate_size',
+]
@@ -0,0 +1,239 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import os.path as path
+import threading
+from time import time
+from uuid import uuid4
+
+import pandas as pd
+
+
+class DataFrameCache(object):
+    """
+    On-disk cache of DataFrames in a columnar format, with a maximum total size enforced by least recently used
+    eviction.
+    Each entry is stored as a data file and a json metadata file, named by the entry key. The metadata file's
+    modification time records when the entry was last used.
+    """
+
+    FORMATS = {
+        'parquet': '.parquet',
+        'feather': '.feather',
+    }
+
+    def __init__(self, cache_dir, max_size=None, file_format='parquet'):
+        """
+        Initialise object
+        :param cache_dir: path to cache directory; created if it doesn't exist
+        :param max_size: maximum total size of cached data in bytes, or None for no limit
+        :param file_format: format of data files; 'parquet' or 'feather'
+        """
+        if file_format not in DataFrameCache.FORMATS:
+            raise ValueError(f'Invalid cache file format: {file_format}')
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._format = file_format
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _data_path(self, key):
+        return path.join(self._cache_dir, f'{key}{DataFrameCache.FORMATS[self._format]}')
+
+    def _meta_path(self, key):
+        return path.join(self._cache_dir, f'{key}.json')
+
+    def get(self, key, ttl=None):
+        """
+        Get a cached DataFrame
+        :param key: entry key
+        :param ttl: maximum age of the entry in seconds, or None for no limit
+        :return: tuple of (panda DataFrame or None if not cached, entry metadata dict or None)
+        """
+        meta_path = self._meta_path(key)
+        try:
+            with open(meta_path, 'r') as fhandle:
+                meta = json.load(fhandle)
+        except (OSError, ValueError):
+            return None, None
+
+        if ttl is not None and time() - meta['created'] > ttl:
+            self.remove(key)
+            return None, None
+
+        try:
+            if self._format == 'parquet':
+                df = pd.read_parquet(self._data_path(key))
+            else:
+                # memory map the file, so the data is paged in from the os cache rather than copied
+                from pyarrow import feather
+                df = feather.read_table(self._data_path(key), memory_map=True).to_pandas()
+        except (OSError, ValueError):
+            self.remove(key)
+            return None, None
+
+        if meta.get('index') is not None:
+            index_columns = df.columns[:len(meta['index'])].tolist()
+            df = df.set_index(index_columns)
+            df.index.names = meta['index']
+        if meta.get('columns') is not None:
+            df.columns = meta['columns']
+
+        # record the use for lru eviction
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return df, meta
+
+    def put(self, key, df, tags=None, **kwargs):
+        """
+        Add a DataFrame to the cache. If writing fails, any partially written files are removed and the exception is
+        raised; callers which cache results should treat this as a warning rather than an error.
+        :param key: entry key
+        :param df: panda DataFrame to cache
+        :param tags: list of tags which may be used to invalidate the entry
+        :param kwargs: additional json-serializable metadata to store with the entry
+        :return: entry metadata dict
+        """
+        meta = dict(kwargs)
+        meta['created'] = time()
+        meta['tags'] = list(tags) if tags is not None else []
+        meta['columns'] = None
+        meta['index'] = None
+
+        if not all([isinstance(column, str) for column in df.columns]):
+            # columnar formats require string column names, so store the originals to restore on read
+            meta['columns'] = df.columns.tolist()
+            df = df.set_axis([str(column) for column in df.columns], axis=1)
+
+        data_path = self._data_path(key)
+        meta_path = self._meta_path(key)
+        tmp_paths = [f'{data_path}.{uuid4().hex}.tmp', f'{meta_path}.{uuid4().hex}.tmp']
+        try:
+            if self._format == 'parquet':
+                df.to_parquet(tmp_paths[0])
+            else:
+                # feather only supports a default index, so store any other index as leading columns
+                if not df.index.equals(pd.RangeIndex(len(df))) or any([name is not None for name in df.index.names]):
+                    meta['index'] = list(df.index.names)
+                    df = df.reset_index()
+                    df = df.set_axis([str(column) for column in df.columns], axis=1)
+                df.to_feather(tmp_paths[0])
+            meta['size'] = path.getsize(tmp_paths[0])
+
+            # write the data before the metadata, so a metadata file is only ever visible with complete data
+            os.replace(tmp_paths[0], data_path)
+            with open(tmp_paths[1], 'w') as fhandle:
+                json.dump(meta, fhandle, default=str)
+            os.replace(tmp_paths[1], meta_path)
+        except Exception:
+            # don't leave partial files or data without matching metadata behind
+            for tmp_path in tmp_paths:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            self.remove(key)
+            raise
+
+        if self._max_size is not None:
+            self.evict(self._max_size)
+
+        return meta
+
+    def remove(self, key):
+        """
+        Remove an entry from the cache
+        :param key: entry key
+        """
+        filenames = [self._meta_path(key)] + \
+            [path.join(self._cache_dir, f'{key}{extension}') for extension in DataFrameCache.FORMATS.values()]
+        for filename in filenames:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    def _entries(self):
+        """
+        Get the cache entries
+        :return: list of tuples of (key, metadata dict, last used time), least recently used first
+        """
+        entries = []
+        for filename in os.listdir(self._cache_dir):
+            if not filename.endswith('.json'):
+                continue
+            meta_path = path.join(self._cache_dir, filename)
+            try:
+                with open(meta_path, 'r') as fhandle:
+                    meta = json.load(fhandle)
+                used = path.getmtime(meta_path)
+            except (OSError, ValueError):
+                continue
+            entries.append((filename[:-len('.json')], meta, used))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def evict(self, max_size):
+        """
+        Remove least recently used entries until the total size of cached data is no more than the specified size
+        :param max_size: maximum total size in bytes
+        :return: list of removed keys
+        """
+        removed = []
+        with self._lock:
+            entries = self._entries()
+            total = sum([meta.get('size', 0) for _, meta, _ in entries])
+            for key, meta, _ in entries:
+                if total <= max_size:
+                    break
+                self.remove(key)
+                total -= meta.get('size', 0)
+                removed.append(key)
+        return removed
+
+    def invalidate(self, tag, keep=None):
+        """
+        Remove all entries with the specified tag
+        :param tag: tag to match
+        :param keep: dict of metadata values; entries whose metadata has all these values are not removed
+        :return: list of removed keys
+        """
+        removed = []
+        with self._lock:
+            for key, meta, _ in self._entries():
+                if tag in meta.get('tags', []):
+                    if keep is not None and all([meta.get(name) == value for name, value in keep.items()]):
+                        continue
+                    self.remove(key)
+                    removed.append(key)
+        return removed
+
+    def size(self):
+        """
+        Get the total size of cached data
+        :return: size in bytes
+        """
+        return sum([meta.get('size', 0) for _, meta, _ in self._entries()])
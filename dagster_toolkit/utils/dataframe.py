@@ -0,0 +1,85 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pandas as pd
+from pandas.api.types import is_integer_dtype, is_float_dtype, is_object_dtype, is_string_dtype, is_bool_dtype
+from pandas.api.extensions import ExtensionDtype
+
+
+def memory_usage(df):
+    """
+    Get the memory usage of a DataFrame, including the contents of object columns
+    :param df: panda DataFrame
+    :return: memory usage in bytes
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def categorize(values, max_ratio):
+    """
+    Convert a text column to a category if it has few unique values
+    :param values: panda Series
+    :param max_ratio: maximum ratio of unique values to values for conversion
+    :return: converted panda Series, or the original if not converted
+    """
+    if len(values) > 0 and (is_object_dtype(values.dtype) or is_string_dtype(values.dtype)):
+        if values.nunique() / len(values) <= max_ratio:
+            values = values.astype('category')
+    return values
+
+
+def downcast_numeric(values):
+    """
+    Convert a numeric column to the smallest type which can represent all its values exactly. Integers are only
+    downcast to signed types, as arithmetic on unsigned types, e.g. subtracting a larger value, wraps around silently.
+    :param values: panda Series
+    :return: converted panda Series, or the original if not converted
+    """
+    if isinstance(values.dtype, ExtensionDtype) or is_bool_dtype(values.dtype):
+        return values
+    if is_integer_dtype(values.dtype):
+        values = pd.to_numeric(values, downcast='integer')
+    elif is_float_dtype(values.dtype):
+        converted = pd.to_numeric(values, downcast='float')
+        # only keep a lower precision if it's lossless
+        if converted.dtype != values.dtype and converted.astype(values.dtype).equals(values):
+            values = converted
+    return values
+
+
+def compact_dataframe(df, category_max_ratio=None):
+    """
+    Reduce the memory usage of a DataFrame by downcasting numeric columns and converting text columns with few unique
+    values to categories
+    :param df: panda DataFrame
+    :param category_max_ratio: maximum ratio of unique values to values for a text column to be converted to a
+                                category; None to never convert
+    :return: compacted panda DataFrame
+    """
+    columns = {}
+    for index in range(len(df.columns)):
+        values = downcast_numeric(df.iloc[:, index])
+        if category_max_ratio is not None:
+            values = categorize(values, category_max_ratio)
+        columns[index] = values
+    compacted = pd.DataFrame(columns, index=df.index)
+    compacted.columns = df.columns
+    return compacted
@@ -0,0 +1,134 @@
+# The MIT License (MIT)
+# Copyright (c) 2019-2021 Ian Buttimer
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from .dataframe import memory_usage
+
+
+def approximate_size(records, sample_size=100):
+    """
+    Estimate the size of a list of records from the length of the text representation of a sample
+    :param records: list of records
+    :param sample_size: maximum number of records to sample
+    :return: approximate size in bytes
+    """
+    if len(records) == 0:
+        return 0
+    step = max(len(records) // sample_size, 1)
+    sample = records[::step]
+    return int(sum([len(str(record)) for record in sample]) * len(records) / len(sample))
+
+
+class PhaseMetrics(object):
+    """
+    Performance metrics of a phase of solid execution
+    """
+    def __init__(self, lock):
+        """
+        Initialise object
+        :param lock: lock guarding updates
+        """
+        self._lock = lock
+        self.seconds = 0.0
+        self.rows = None
+        self.bytes = None
+        self.memory = None
+
+    def add(self, rows=None, nbytes=None, df=None):
+        """
+        Add to the totals of the phase
+        :param rows: number of rows
+        :param nbytes: number of bytes
+        :param df: panda DataFrame whose rows and memory usage are added
+        """
+        memory = None
+        if df is not None:
+            rows = len(df)
+            memory = memory_usage(df)
+        with self._lock:
+            if rows is not None:
+                self.rows = rows + (self.rows or 0)
+            if nbytes is not None:
+                self.bytes = nbytes + (self.bytes or 0)
+            if memory is not None:
+                self.memory = memory + (self.memory or 0)
+
+
+class SolidMetrics(object):
+    """
+    Performance metrics of the phases of solid execution, e.g. connect, execute, fetch and build, for reporting as
+    event metadata. Repeated phases, such as the fetching of batches, are totalled.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._start = perf_counter()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._phases:
+                self._phases[name] = PhaseMetrics(self._lock)
+            return self._phases[name]
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Time a phase
+        :param name: name of phase
+        :return: context manager yielding the PhaseMetrics of the phase
+        """
+        phase = self[name]
+        start = perf_counter()
+        try:
+            yield phase
+        finally:
+            elapsed = perf_counter() - start
+            with self._lock:
+                phase.seconds += elapsed
+
+    def metadata(self):
+        """
+        Get the metrics as event metadata
+        :return: dict of '<phase>_seconds', '<phase>_rows', '<phase>_bytes' and '<phase>_memory' values, and the
+                total elapsed time as 'total_seconds'
+        """
+        metadata = {}
+        with self._lock:
+            for name, phase in self._phases.items():
+                metadata[f'{name}_seconds'] = phase.seconds
+                for metric in ['rows', 'bytes', 'memory']:
+                    value = getattr(phase, metric)
+                    if value is not None:
+                        metadata[f'{name}_{metric}'] = value
+        metadata['total_seconds'] = perf_counter() - self._start
+        return metadata
+
+    def log(self, context):
+        """
+        Log a summary of the metrics
+        :param context: execution context
+        """
+        context.log.debug('Performance: ' + ', '.join([f'{key} {value:.3f}' if isinstance(value, float)
+                                                       else f'{key} {value}'
+                                                       for key, value in self.metadata().items()]))
@@ -29,6 +29,9 @@ setuptools.setup(
       'dagster_pandas>=0.13.1',
       'pandas>=1.3.4'
     ],
+    extras_require={
+        'arrow': ['pyarrow>=5.0.0'],
+    },
     dependency_links=[
         'git+https://github.com/ib-da-ncirl/db_toolkit.git#egg=db_toolkit',
     ],